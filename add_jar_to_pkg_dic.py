@@ -6,6 +6,11 @@ from tqdm import tqdm
 import pickle
 import matplotlib.pyplot as plt
 from utils_tool.helper import *
+from utils_tool.metadata_store import MetadataStore
+from utils_tool.usage_summary import summarize_meta_info, SUMMARY_VERSION
+
+
+INGEST_STATE_PATH = "./metaDB/metadata/ingest_state.json"
 
 
 def load_json(file_path):
@@ -29,35 +34,86 @@ class Stats:
         self.add_dic_from_new = 0
 
 
-def enlarge_dic(jar_to_pkgs_dic): 
+def enlarge_dic(store, coordinates=None, state=None):
     """
-    Enlarge the given dictionary with additional package data if available.
+    Enlarge the metadata store with additional package data if available.
     """
     stat = Stats()
-    enlarged_mapping = add_dic(jar_to_pkgs_dic, stat, './results/jarpkgtags/')
+    add_dic(store, stat, './results/jarpkgtags/', coordinates, state)
+    return stat
+
+
+def load_ingest_state():
+    """
+    Load the [mtime, size] of every meta_info.json already ingested into the store.
+
+    The state is dropped when it was written for another summary version, so that
+    every file is ingested again and gets an up-to-date usage summary.
+    """
+    if not os.path.exists(INGEST_STATE_PATH):
+        return {}
+    try:
+        state = load_json(INGEST_STATE_PATH)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if state.get("summary_version") != SUMMARY_VERSION:
+        return {}
+    return state.get("files", {})
+
+
+def save_ingest_state(state):
+    with open(INGEST_STATE_PATH + ".tmp", 'w') as f:
+        json.dump({"summary_version": SUMMARY_VERSION, "files": state}, f)
+    os.replace(INGEST_STATE_PATH + ".tmp", INGEST_STATE_PATH)
 
-    # Ensure the metadata directory exists
-    metadata_dir = "./metaDB/metadata/"
-    if not os.path.exists(metadata_dir):
-        os.makedirs(metadata_dir)  # Create missing directories
 
-    # Write the JSON file
-    with open(os.path.join(metadata_dir, "jar_to_pkgs_dic.json"), 'w') as f:
-        json.dump(enlarged_mapping, f)
+def file_signature(file):
+    info = os.stat(file)
+    return [info.st_mtime_ns, info.st_size]
 
 
-def add_dic(mapping, stat, directory):
+def get_meta_info_files(directory, coordinates=None):
     """
-    Add new entries to the existing mapping dictionary from JSON files in the specified directory.
+    List the meta_info.json files of the given coordinates, or of every coordinate in the directory.
+    """
+    if coordinates is None:
+        return glob.glob(os.path.join(directory, '**/meta_info.json'), recursive=True)
+    file_list = []
+    for purl in coordinates:
+        file = os.path.join(directory, *purl.split("|"), "meta_info.json")
+        if os.path.exists(file):
+            file_list.append(file)
+    return file_list
+
+
+def add_dic(store, stat, directory, coordinates=None, state=None):
     """
-    file_list = glob.glob(os.path.join(directory, '**/meta_info.json'), recursive=True)
+    Add new entries to the metadata store from JSON files in the specified directory.
+
+    With an ingest `state`, only meta_info.json files that are new or changed since
+    they were last ingested are read, and a changed file replaces the entry it produced.
+    The usage summary of every read file is recorded as well, so that the analysis
+    does not need to parse meta_info.json.
+    """
+    file_list = get_meta_info_files(directory, coordinates)
+    entries = {}
+    summaries = {}
     for file in tqdm(file_list, desc="Processing files"):
         gid = file.split("/")[-4]
         aid = file.split("/")[-3]
         vid = file.split("/")[-2]
         purl = f'{gid}|{aid}|{vid}'
-        
-        if purl in mapping:
+
+        # keep package lists from other sources (index import, probing)
+        keep_packages = False
+        if state is not None:
+            signature = file_signature(file)
+            ingested = file in state
+            if ingested and state[file] == signature:
+                continue
+            state[file] = signature
+            keep_packages = not ingested and store.has(purl)
+        elif store.has(purl):
             #print(f"Artifact {purl} is already added.")
             continue
 
@@ -68,45 +124,55 @@ def add_dic(mapping, stat, directory):
             stat.read_error += 1
             continue
 
+        summaries[purl] = summarize_meta_info(pkg_json)
+        if keep_packages:
+            continue
+
         # Extract package list
         pkg_list = pkg_json.get("packages", {}).keys() if "packages" in pkg_json else []
         
         if not pkg_list:
             stat.package_list_is_empty_count += 1
 
-        # Add new package list to mapping
-        if purl not in mapping:
-            mapping[purl] = list(pkg_list)
-            stat.add_dic_from_new += 1
+        entries[purl] = list(pkg_list)
 
+    stat.add_dic_from_new += store.add_many(entries, replace=True)
+    store.put_usage_summaries(summaries)
     #print(f"Added {stat.add_dic_from_new} new metadata entries.")
-    return mapping
+    return store
 
 
-def switch_key_value(jar_to_pkgs_dic):
+def add_packages_to_dic(new_entries):
     """
-    Switch key-value pairs from jar-to-package mapping to package-to-jar mapping.
-    """
-    data = load_json(jar_to_pkgs_dic)
-    pkg_to_jar_mapping = collections.defaultdict(set)
-    
-    for key, value in tqdm(data.items(), desc="Switching key-value pairs"):
-        for pkg in value:
-            pkg_to_jar_mapping[pkg].add(key)
-
-    # Save the package-to-jar mapping
-    serializable_pkg_to_jar_mapping = {k: list(v) for k, v in sorted(pkg_to_jar_mapping.items())}
-    with open("./metaDB/metadata/pkg_to_jar_dic.json", 'w') as f:
-        json.dump(serializable_pkg_to_jar_mapping, f)
+    Add package lists obtained without jarpkgtags (e.g. by probing the central
+    directory of a JAR) to the metadata store. Existing entries are kept.
 
+    Args:
+        new_entries (dict): "groupId|artifactId|version" -> iterable of package names.
+    """
+    if not new_entries:
+        return
+    with MetadataStore() as store:
+        store.add_many({purl: sorted(pkg_list) for purl, pkg_list in new_entries.items()})
 
-def add_to_dic():
-    if os.path.exists("./metaDB/metadata/jar_to_pkgs_dic.json"):
-        jar_to_pkgs_dic = load_json("./metaDB/metadata/jar_to_pkgs_dic.json")
-    else:
-        jar_to_pkgs_dic={}
-    
-    enlarge_dic(jar_to_pkgs_dic)
-    switch_key_value("./metaDB/metadata/jar_to_pkgs_dic.json")
 
+def add_to_dic(coordinates=None):
+    """
+    Add the jarpkgtags results to the metadata store, only reading those of `coordinates` if given.
 
+    Only meta_info.json files that are new or changed since the last run are read,
+    and the store is not opened when there are none. Each changed artifact updates
+    both directions of the mapping in place: its package list and the package ->
+    artifacts index answering MetadataStore.providers(), which replaces the
+    pkg_to_jar_dic.json that used to be rebuilt in full on every run.
+    """
+    state = load_ingest_state()
+    pending = [f for f in get_meta_info_files('./results/jarpkgtags/', coordinates)
+               if state.get(f) != file_signature(f)]
+    if not pending:
+        return
+
+    pending_coordinates = ["|".join(f.split("/")[-4:-1]) for f in pending]
+    with MetadataStore() as store:
+        enlarge_dic(store, pending_coordinates, state)
+    save_ingest_state(state)
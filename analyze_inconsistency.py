@@ -5,7 +5,12 @@ import subprocess
 import concurrent.futures
 from utils_tool.helper import *
 import networkx as nx
-from collections import defaultdict
+import threading
+from collections import defaultdict, OrderedDict
+from utils_tool.metadata_store import MetadataStore
+from utils_tool.package_index import PackageInterner
+from utils_tool.edge_matrix import bitsets_to_matrix, edges_without_overlap
+from utils_tool.usage_summary import JDK_PACKAGES, SUMMARY_VERSION, summarize_meta_info
 
 
 
@@ -22,14 +27,20 @@ class BomGraph:
         sbom_dir_deps (list): Direct dependencies from the SBOM.
         sbom_second_deps (list): Second-level dependencies from the root.
         various_logs (dict): Containers for logging missing and incorrect dependencies.
-    """
-    def __init__(self, file):
+        metadata_store (MetadataStore): Packages provided by each artifact, read on demand.
+        package_ids (PackageInterner): Package name -> ID of the package bitsets.
+        provided_bits (dict): Artifact -> bitset of its provided packages (None if uncollected).
+        provided_index (dict): Scope (whole tree, a layer) -> bitset of all packages provided in it.
+        sibling_provision (tuple): Packages provided under at least one / two second-level nodes.
+        meta_cache (MetaInfoCache): meta_info.json of the audited artifacts, loaded once.
+    """
+    def __init__(self, file, meta_cache=None):
         self.file = file
         self.sbom_json = get_sbom(file)
         self.sbom_graph = get_sbom_dependency_relationship(self.sbom_json)  
         self.root_node = [node for node, degree in  self.sbom_graph.in_degree() if degree == 0][0]
         self.sbom_dir_deps = get_sbom_direct_deps(self.sbom_graph)
-        self.sbom_second_deps=self.sbom_graph.successors(self.root_node)
+        self.sbom_second_deps=list(self.sbom_graph.successors(self.root_node))
         self.missing_log={"missing_deps": {}} 
         self.incorrect_log = {"incorrect_deps": defaultdict(dict)}
         self.incorrect_transitive_deps_log = {"incorrect_transitive_deps": []} 
@@ -38,12 +49,98 @@ class BomGraph:
         self.missing_transitive_relationship_log={"missing_transitive_relationship":[]}
         self.uncollected_log={"first_level":[],"second_level":defaultdict(dict)}
         self.unresolved_dynamic={"first_level":defaultdict(dict),"second_level":defaultdict(dict)}
-        # Load pre-existing mappings for packages and JARs
-        self.jar_to_pkgs_dic=load_json("./metaDB/metadata/jar_to_pkgs_dic.json")
+        # Pre-existing mappings for packages and JARs, only the touched artifacts are read
+        self.metadata_store=MetadataStore()
+        self.package_ids=PackageInterner()
+        self.provided_bits={}
+        self.provided_index={}
+        self.sibling_provision=None
+        self.meta_cache=meta_cache if meta_cache is not None else MetaInfoCache()
         self.all_disclosed_deps=[purl_to_aid_gid_vid(n) for n in self.sbom_graph.nodes()]
         self.mode="global"
 
 
+class MetaInfo:
+    """
+    Usage summary of one artifact, as computed at metaDB ingestion.
+
+    Attributes:
+        internal (list): Packages provided by the artifact itself.
+        usage (list): External packages used by the artifact (see summarize_meta_info).
+        unresolved (list): Unresolved dynamically loaded classes.
+    """
+    def __init__(self, summary):
+        self.internal = summary["internal"]
+        self.usage = summary["usage"]
+        self.unresolved = summary["unresolved_dynamic"]
+
+
+class MetaInfoCache:
+    """
+    Serves the MetaInfo of each artifact to every detector, reading it once.
+
+    Summaries are read from the metadata store. Only artifacts tagged but not
+    yet ingested fall back to parsing their meta_info.json.
+
+    One cache is owned by an audit. With `maxsize`, it keeps only the most
+    recently used entries and can be shared by several audits in one process.
+
+    Attributes:
+        maxsize (int or None): Maximum number of entries, unbounded if None.
+        entries (OrderedDict): "groupId|artifactId|version" -> MetaInfo, or None if unavailable.
+        hits (int): Lookups served from the cache.
+        misses (int): Lookups that read the summary.
+    """
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, coordinate, metadata_store=None):
+        with self.lock:
+            if coordinate in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(coordinate)
+                return self.entries[coordinate]
+        summary = metadata_store.get_usage_summary(coordinate) if metadata_store is not None else None
+        if summary is None or summary.get("version") != SUMMARY_VERSION:
+            meta_json = load_meta_info(get_coordinate_meta_info_path(coordinate))
+            summary = summarize_meta_info(meta_json) if meta_json is not None else None
+        meta_info = MetaInfo(summary) if summary is not None else None
+        with self.lock:
+            self.misses += 1
+            self.entries[coordinate] = meta_info
+            if self.maxsize is not None:
+                while len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+        return meta_info
+
+    def report(self):
+        print("metadata cache: {} hits, {} misses, {} entries".format(self.hits, self.misses, len(self.entries)))
+
+
+def get_coordinate_meta_info_path(coordinate):
+    return "./results/jarpkgtags/"+coordinate.replace("|","/")+"/meta_info.json"
+
+
+def load_meta_info(path):
+    """
+    Loads a meta_info.json file.
+
+    Returns:
+        dict or None: Loaded JSON metadata if found, otherwise None.
+    """
+    if os.path.exists(path):
+        try:
+            meta_data=load_json(path)
+            return meta_data
+        except:
+            print("fail to load meta_data")
+            return None
+    return None
+
 
 
 def purl_to_aid_gid_vid(purl):
@@ -112,88 +209,25 @@ def get_sbom_direct_deps(G):
 
 #Skip the classes from JDK which are not considered as external dependencies
 def skip(item):
-    skip_list=["java.","javax.","sun.misc","org.xml.sax","sun.nio.ch","org.w3c.dom","com.sun."]
-    for pre in skip_list:
-        if item.startswith(pre):
-            return True
-    return False
+    return JDK_PACKAGES.has_prefix_of(item)
 
 
 
-def get_all_usage_pkg(meta_json):
-    """
-    Extracts all internal and external packages used from metadata.
-    
-    Args:
-        meta_json (dict): Metadata JSON containing package information.
-        
-    Returns:
-        list: List of unique external package usages.
+def get_provided_bits(bomGraph, node):
     """
-    #get all internal pkg
-    if meta_json is None:
-        print("error: can not get internal package info")
-        return 
-    provided_internal_pkg=[]
-    if "packages" in meta_json.keys():
-        for pkg in meta_json["packages"]:
-            if len(pkg)==0:
-                continue
-            provided_internal_pkg.append(pkg)
-    
-
-    #get all external used pkg
-    usage=[]
-    for pkg in meta_json["packages"]:
-        if len(pkg)==0:
-            continue
-        for u in meta_json["packages"][pkg]["uses"]:
-            #filter our if the pkg is internal usage
-            if u in provided_internal_pkg or skip(u):
-                continue
-            usage.append(u)
-        
-        if "reflected" in meta_json["packages"][pkg].keys():
-            for r in meta_json["packages"][pkg]["reflected"]:
-                if r in provided_internal_pkg or skip(r):
-                    continue
-                usage.append(r)
+    Returns the bitset of the packages provided by an artifact, computed once per graph.
 
-    return list(set(usage))
-
-
-def get_unresolved_dynamic(meta_json):
-    """
-    Retrieves dynamically unresolved packages from metadata.
-    
     Args:
-        meta_json (dict): Metadata JSON containing package information.
-        
-    Returns:
-        list: List of unresolved dynamic packages.
-    """
-    unresolved_dynamic=[]
-    for pkg in meta_json["packages"]:
-        if "unresolved_dynamic" in meta_json["packages"][pkg].keys():
-            unresolved_dynamic.extend(meta_json["packages"][pkg]["unresolved_dynamic"])
-    return unresolved_dynamic
-
-
+        bomGraph (BomGraph): Instance of BomGraph representing the SBOM graph and data.
+        node (str): Artifact as "groupId|artifactId|version".
 
-def has_overlap(list1, list2):
-    """
-    Checks if there is any overlap between two lists, based on prefix.
-    
-    Args:
-        list1, list2 (list): Lists of items to compare.
-        
     Returns:
-        bool: True if there is overlap, False otherwise.
+        int or None: Bitset over bomGraph.package_ids, or None if the artifact is not collected.
     """
-    new_list1=[item.split("|")[0] for item in list1]
-    new_list2=[item.split("|")[0] for item in list2]
-
-    return bool(set(new_list1) & set(new_list2))
+    if node not in bomGraph.provided_bits:
+        pkgs=bomGraph.metadata_store.get_packages(node)
+        bomGraph.provided_bits[node]=None if pkgs is None else bomGraph.package_ids.bitset(pkgs)
+    return bomGraph.provided_bits[node]
 
 
 
@@ -217,28 +251,22 @@ def get_sbom_second_level_nodes(G):
     return [purl_to_aid_gid_vid(c) for c in root_children]
 
 
-def get_meta_info(node_l2):
+def get_node_meta(bomGraph, node_l2):
     """
-    Retrieves metadata information for a second-level dependency node.
+    Returns the MetaInfo of a second-level dependency node from the audit's cache, or None.
+    """
+    return bomGraph.meta_cache.get(purl_to_aid_gid_vid(node_l2), bomGraph.metadata_store)
 
-    Args:
-        node_l2 (str): Node identifier for the second-level dependency.
 
-    Returns:
-        dict or None: Loaded JSON metadata if found, otherwise None.
+def get_root_meta(bomGraph):
     """
-    root_path="./results/jarpkgtags/"
-    relative_path=purl_to_aid_gid_vid(node_l2).replace("|","/")
-    full_path=root_path+relative_path+"/"+"meta_info.json"
-
-    if os.path.exists(full_path):
-        try:
-            meta_data=load_json(full_path)
-            return meta_data
-        except:
-            print("fail to load meta_data")
-            return None
-    return None
+    Returns the MetaInfo of the audited artifact from the audit's cache.
+    """
+    coordinate="|".join(bomGraph.file.split("/")[-4:-1])
+    meta_info=bomGraph.meta_cache.get(coordinate, bomGraph.metadata_store)
+    if meta_info is None:
+        print("error: can not get internal package info")
+    return meta_info
 
 
 def detect_missing_dependency(bomGraph):
@@ -250,20 +278,19 @@ def detect_missing_dependency(bomGraph):
     """
     if bomGraph.sbom_json is None:
         return 
-    meta_json = get_meta_data(bomGraph.file)
-    all_usage = get_all_usage_pkg(meta_json)
+    all_usage = get_root_meta(bomGraph).usage
     #print("sbom_dir_deps is {}".format(len(set(bomGraph.sbom_dir_deps))))
 
     if bomGraph.mode ==  "global":
         print("Performing whole tree search")
-        all_provided_packages=get_all_provided_packages(bomGraph, bomGraph.all_disclosed_deps)
+        all_provided_packages=get_provided_index(bomGraph, "global", bomGraph.all_disclosed_deps)
 
     elif bomGraph.mode == "layer":
         print("Performing layer search")
-        all_provided_packages=get_all_provided_packages(bomGraph, bomGraph.sbom_dir_deps)
+        all_provided_packages=get_provided_index(bomGraph, "first_level", bomGraph.sbom_dir_deps)
     
     for usage in all_usage:
-        if usage not in all_provided_packages:
+        if not bomGraph.package_ids.contains(all_provided_packages, usage):
             bomGraph.missing_log["missing_deps"][usage] = []
 
         '''
@@ -284,20 +311,22 @@ def detect_incorrect_dependency(bomGraph):
     if bomGraph.sbom_json==None:
         return 
     incorrect_deps=set()
-    meta_json=get_meta_data(bomGraph.file)
-    all_usage=get_all_usage_pkg(meta_json)
+    meta_info=get_root_meta(bomGraph)
+    all_usage=meta_info.usage
+    usage_bits=bomGraph.package_ids.bitset(all_usage)
 
     for dep in  bomGraph.sbom_dir_deps:
-        if dep not in bomGraph.jar_to_pkgs_dic.keys():
+        dep_bits=get_provided_bits(bomGraph, dep)
+        if dep_bits is None:
             incorrect_deps.add(dep)
             continue
-        dep_pkgs= bomGraph.jar_to_pkgs_dic[dep]
-        if len(all_usage) >0 and len(dep_pkgs) > 0 and not has_overlap(all_usage, dep_pkgs):
-            bomGraph.incorrect_log["incorrect_deps"][dep]["provided_packages"]=list(dep_pkgs)
+        # none of the packages provided by dep is used
+        if usage_bits and dep_bits and not usage_bits & dep_bits:
+            bomGraph.incorrect_log["incorrect_deps"][dep]["provided_packages"]=list(bomGraph.metadata_store.get_packages(dep))
     
     #record potential causes of FP or FN
     bomGraph.uncollected_log["first_level"]=list(incorrect_deps)
-    unresolved = get_unresolved_dynamic(meta_json)
+    unresolved = meta_info.unresolved
     if len(unresolved)!=0:
         bomGraph.unresolved_dynamic["first_level"][purl_to_aid_gid_vid(bomGraph.root_node)]=unresolved
     
@@ -307,43 +336,93 @@ def detect_incorrect_transitive_dependency(bomGraph):
     """
     Detects incorrect transitive dependencies in the SBOM dependency graph.
 
+    The usages of the second-level nodes and the packages provided by their
+    children are packed into a "uses" and a "provides" bit matrix, and every
+    level-2 -> level-3 edge is evaluated in one vectorized pass.
+
     Args:
         bomGraph (BomGraph): Instance of BomGraph representing the SBOM graph and data.
     """
     if bomGraph.sbom_json is None:
         return   
-    
+
+    #step one: collect the usages of node_l2 and its edges to collected node_l3
+    sources=[]
+    usage_rows=[]
+    targets={}
+    edges=[]
     for node_l2 in bomGraph.sbom_second_deps:
         uncollected=[]
         node_l2_=purl_to_aid_gid_vid(node_l2)
-        meta_json=get_meta_info(node_l2)
-        if meta_json == None:
+        meta_info=get_node_meta(bomGraph, node_l2)
+        if meta_info == None:
             continue
 
-        all_usage=get_all_usage_pkg(meta_json)
-        for node_l3 in list(bomGraph.sbom_graph.successors(node_l2)):
-            #check any used packages in node_l2 is provided by node node_l3
+        row=len(sources)
+        sources.append(node_l2_)
+        usage_rows.append(bomGraph.package_ids.bitset(meta_info.usage))
+        for node_l3 in bomGraph.sbom_graph.successors(node_l2):
             node_l3_=purl_to_aid_gid_vid(node_l3)
-            if node_l3_ not in bomGraph.jar_to_pkgs_dic.keys():
+            if get_provided_bits(bomGraph, node_l3_) is None:
                 uncollected.append(node_l3_)
                 continue
-            dep_pkgs= bomGraph.jar_to_pkgs_dic[node_l3_]
-            if len(all_usage) >0 and len(dep_pkgs) > 0 and not has_overlap(all_usage, dep_pkgs):
-                record={}
-                record["from"]=node_l2_
-                record["to"]=node_l3_
-                if bomGraph.sbom_graph.in_degree(node_l3)<=1:
-                    bomGraph.incorrect_transitive_deps_log["incorrect_transitive_deps"].append(record)
-                #node_l3 has two or more parents
-                else:
-                    bomGraph.incorrect_transitive_relationship_log["incorrect_transitive_relationship"].append(record)
-        unresolved=get_unresolved_dynamic(meta_json)
+            targets.setdefault(node_l3_, len(targets))
+            edges.append((row, node_l3, node_l3_))
+        unresolved=meta_info.unresolved
         if len(unresolved)!=0:
             bomGraph.unresolved_dynamic["second_level"][node_l2_]=unresolved
         bomGraph.uncollected_log["second_level"][node_l2_]=uncollected
+
+    #step two: check for every edge whether any used package in node_l2 is provided by node_l3
+    width=len(bomGraph.package_ids)
+    uses=bitsets_to_matrix(usage_rows, width)
+    provides=bitsets_to_matrix([bomGraph.provided_bits[node] for node in targets], width)
+    flags=edges_without_overlap(uses, provides, [edge[0] for edge in edges], [targets[edge[2]] for edge in edges])
+
+    #step three: record the edges in graph order
+    for (row, node_l3, node_l3_), flag in zip(edges, flags):
+        if not flag:
+            continue
+        record={}
+        record["from"]=sources[row]
+        record["to"]=node_l3_
+        if bomGraph.sbom_graph.in_degree(node_l3)<=1:
+            bomGraph.incorrect_transitive_deps_log["incorrect_transitive_deps"].append(record)
+        #node_l3 has two or more parents
+        else:
+            bomGraph.incorrect_transitive_relationship_log["incorrect_transitive_relationship"].append(record)
     
 
 
+def get_children_provided_bits(bomGraph, node_l2):
+    """
+    Returns the bitset of the packages provided by the children of a second-level node.
+    """
+    children=[purl_to_aid_gid_vid(n) for n in bomGraph.sbom_graph.successors(node_l2)]
+    return get_provided_index(bomGraph, ("third_level", node_l2), children)
+
+
+def get_sibling_provision_index(bomGraph):
+    """
+    Counts, for every package, how many second-level nodes have a child providing it.
+
+    The counts saturate at two and are kept as two bitsets: packages provided
+    under at least one and under at least two second-level nodes. Built once per graph.
+
+    Returns:
+        tuple: (at_least_once, at_least_twice) bitsets over bomGraph.package_ids.
+    """
+    if bomGraph.sibling_provision is None:
+        once=0
+        twice=0
+        for n2 in bomGraph.sbom_second_deps:
+            bits=get_children_provided_bits(bomGraph, n2)
+            twice|=once & bits
+            once|=bits
+        bomGraph.sibling_provision=(once, twice)
+    return bomGraph.sibling_provision
+
+
 def check_missing_node_has_other_parent(bomGraph,node_l2,usage):
     """
     Checks if a node with missing dependencies has another parent in the graph.
@@ -354,31 +433,38 @@ def check_missing_node_has_other_parent(bomGraph,node_l2,usage):
         usage (list): package used in the node_l2.
 
     Returns:
-        bool: True if the used package has another parent, False otherwise.
+        bool: True if the used package is provided by a child of another second-level node, False otherwise.
     """
-    #collect other nodes' children
-    child_node_l3=[]
-    for n2 in bomGraph.sbom_second_deps:
-        if n2==node_l2:
-            continue
-        child_node_l3.extend([purl_to_aid_gid_vid(n) for n in list (bomGraph.sbom_graph.successors(n2))])
-
-        #get all usages from child_node_l3
-        provided_packages=get_all_provided_packages(bomGraph,child_node_l3)
-    
-    if usage in provided_packages:
+    package_id=bomGraph.package_ids.ids.get(usage)
+    if package_id is None:
+        return False
+    once, twice=get_sibling_provision_index(bomGraph)
+    if (twice >> package_id) & 1:
         return True
-    else:
+    if not (once >> package_id) & 1:
         return False
+    # provided under exactly one second-level node: is it another one than node_l2?
+    return not (get_children_provided_bits(bomGraph, node_l2) >> package_id) & 1
 
 
-def get_all_provided_packages(bomGraph,nodes):
-    provided_packages=[]
-    for node in nodes:
-        pkgs=bomGraph.jar_to_pkgs_dic.get(node,[])
-        provided_packages.extend(pkgs)
-    return provided_packages
+def get_provided_index(bomGraph, scope, nodes):
+    """
+    Returns the bitset of all packages provided by `nodes`, built once per graph and scope.
 
+    Args:
+        bomGraph (BomGraph): Instance of BomGraph representing the SBOM graph and data.
+        scope: Key of the node set, e.g. "global" for the whole tree.
+        nodes (list): Artifacts as "groupId|artifactId|version".
+
+    Returns:
+        int: Bitset over bomGraph.package_ids; test packages with package_ids.contains.
+    """
+    if scope not in bomGraph.provided_index:
+        bits=0
+        for node in nodes:
+            bits|=get_provided_bits(bomGraph, node) or 0
+        bomGraph.provided_index[scope]=bits
+    return bomGraph.provided_index[scope]
 
 
 def detect_missing_transitive_dependency(bomGraph):
@@ -391,29 +477,27 @@ def detect_missing_transitive_dependency(bomGraph):
     if bomGraph.sbom_json is None:
         return   
     for node_l2 in bomGraph.sbom_second_deps:
-        meta_json=get_meta_info(node_l2)
-        if meta_json == None:
+        meta_info=get_node_meta(bomGraph, node_l2)
+        if meta_info == None:
             continue
         
         #get all used packages in node_l2
-        all_usage=get_all_usage_pkg(meta_json)
+        all_usage=meta_info.usage
         node_l2_=purl_to_aid_gid_vid(node_l2)
 
-        #get provided packages from all third-level nodes
-        sbom_third_level_nodes=[purl_to_aid_gid_vid(n) for n in list(bomGraph.sbom_graph.successors(node_l2))]
-
+        provided_packages=0
         if bomGraph.mode ==  "global":
             print("Performing whole tree search")
              # check whether each used package are provided by any nodes in the tree
-            provided_packages=get_all_provided_packages(bomGraph, bomGraph.all_disclosed_deps)
+            provided_packages=get_provided_index(bomGraph, "global", bomGraph.all_disclosed_deps)
 
         elif bomGraph.mode == "layer":
             print("Performing layer search")
             # check whether each used package are provided by any third-level nodes
-            provided_packages=get_all_provided_packages(bomGraph, sbom_third_level_nodes)
+            provided_packages=get_children_provided_bits(bomGraph, node_l2)
 
         for usage in all_usage:
-            if usage not in provided_packages:
+            if not bomGraph.package_ids.contains(provided_packages, usage):
                 record={}
                 record["node_l2"]=node_l2_
                 record["usage"]=usage
@@ -460,7 +544,7 @@ def build_nested_dict(graph, node):
 
 
 
-def analyze_inconsistency(file, to_graph,to_result,mode):
+def analyze_inconsistency(file, to_graph,to_result,mode,meta_cache=None):
     """
     Analyzes inconsistencies in an SBOM graph, identifying missing and incorrect dependencies.
 
@@ -468,8 +552,10 @@ def analyze_inconsistency(file, to_graph,to_result,mode):
         file (str): Path to the SBOM file.
         to_graph (str): Path to save the graph structure as JSON.
         to_result (str): Path to save the results as JSON.
+        meta_cache (MetaInfoCache, optional): Metadata cache shared across audits,
+            e.g. a size-bounded one; a private cache is used if omitted.
     """
-    bomGraph=BomGraph(file)
+    bomGraph=BomGraph(file, meta_cache)
     bomGraph.mode=mode
     check_missing_and_incorrect_deps(bomGraph)
     result={}
@@ -484,6 +570,7 @@ def analyze_inconsistency(file, to_graph,to_result,mode):
    
     with open(to_result, 'w') as json_file:
         json.dump(result, json_file, indent=4)
+    bomGraph.metadata_store.close()
 
     
     if not os.path.exists(to_graph):
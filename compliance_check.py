@@ -7,12 +7,32 @@ import sys
 from utils_tool.helper import *
 import networkx as nx
 from collections import defaultdict
-from analyze_inconsistency import analyze_inconsistency
+from analyze_inconsistency import analyze_inconsistency, MetaInfoCache
 import shutil
 import zipfile
 import subprocess
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tabulate import tabulate
+from utils_tool.primary_jar import PrimaryJarManifest
+from utils_tool.metadata_store import MetadataStore
+from utils_tool.class_refs import load_class_refs
+from utils_tool.multi_match import ClassFileScanner
+from utils_tool.jar_archive import archive_entry_path
+from utils_tool.extraction_cache import ExtractionCache, EXTRACTION_CACHE_QUOTA
+from utils_tool.blob_store import BlobStore
+import hashlib
+
+
+# how validation finds the class files referring to a name
+EVIDENCE_INDEX = "index"   # persisted constant-pool reference index of each JAR
+EVIDENCE_SCAN = "scan"     # one multi-pattern scan of the class files
+
+# where validation reads the class files from
+WORKSPACE_ARCHIVE = "archive"   # straight from the JAR, nothing is written
+WORKSPACE_EXTRACT = "extract"   # legacy: from the JAR extracted in the shared extraction cache
+
+# bump when validation changes what it finds for a dependency edge, so that cached verdicts are recomputed
+ANALYZER_VERSION = 1
 
 
 
@@ -25,7 +45,8 @@ class Validation:
 
     Attributes:
         work_path (str): Working directory path.
-        unjar_dir (str): Directory where JAR contents are extracted.
+        unjar_dir (str): Where the classes of the audited JAR are read from: the JAR itself, or the
+            directory it is extracted to in the extract workspace.
         uncollected (dict): Uncollected dependencies.
         unresolved (dict): Unresolved dependencies.
         validate_missing_log (dict): Log for missing dependencies validation.
@@ -34,9 +55,14 @@ class Validation:
         validate_incorrect_transitive_relationship_log (dict): Log for incorrect transitive relationship validation.
         validate_missing_transitive_dependency_log (dict): Log for missing transitive dependencies validation.
         validate_missing_transitive_relationship_log (dict): Log for missing transitive relationships validation.
+        evidence (str): EVIDENCE_INDEX or EVIDENCE_SCAN.
+        workspace (str): WORKSPACE_ARCHIVE or WORKSPACE_EXTRACT.
+        extraction_cache (ExtractionCache): Extracted JAR trees, in the extract workspace.
+        jar_digests (dict): Dependency coordinate -> SHA-256 of its JAR, the key of its edge verdicts.
     """
 
-    def __init__(self, work_path, unjar_dir, uncollected, unresolved):
+    def __init__(self, work_path, unjar_dir, uncollected, unresolved, evidence=EVIDENCE_INDEX,
+                 workspace=WORKSPACE_ARCHIVE, extraction_cache=None):
         self.work_path = work_path
         self.unjar_dir = unjar_dir
         self.uncollected = uncollected
@@ -47,17 +73,62 @@ class Validation:
         self.validate_incorrect_transitive_relationship_log = {"validate_incorrect_transitive_relationship": []}
         self.validate_missing_transitive_dependency_log = {"validate_missing_transitive_dependency": []}
         self.validate_missing_transitive_relationship_log = {"validate_missing_transitive_relationship": []}
-        self.jar_to_pkgs_dic=load_json("./metaDB/metadata/jar_to_pkgs_dic.json")
+        self.metadata_store=MetadataStore()
+        self.primary_jars=PrimaryJarManifest()
+        self.evidence=evidence
+        self.workspace=workspace
+        self.extraction_cache=extraction_cache
+        # proofs depend on how class files are found and named, verdicts are only shared between equal settings
+        self.analyzer="{}/{}/{}".format(ANALYZER_VERSION, evidence, workspace)
+        self.blob_store=BlobStore()
+        # dependency coordinate -> SHA-256 of its JAR, hashed at most once per audit
+        self.jar_digests={}
+        self.verdict_hits=0
+        self.verdict_misses=0
+        # search root (JAR or extracted directory) -> reference index of its JAR
+        self.class_refs={}
+
+
+def find_references(classnames, search_root, vail):
+    """
+    Looks up, in one call, the class files of a JAR that refer to each name.
+
+    The reference index of the JAR answers when one is loaded for `search_root`,
+    otherwise the class files are scanned once for all the names.
 
+    Args:
+        search_root (str): The JAR in the archive workspace, its extracted directory otherwise.
 
-def is_existed(classname, unjar_dir):
-    command = ["grep", "-r", classname, unjar_dir]
-    # Run the command and capture the output
-    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    if "Binary file" in result.stdout and ".class" in result.stdout:
-        return True,result
+    Returns:
+        dict: classname -> (True if a class file refers to it, proof in `grep -r` form listing those files).
+    """
+    class_refs = vail.class_refs.get(search_root)
+    if class_refs is not None:
+        matches = {classname: class_refs.lookup(classname) for classname in classnames}
+    elif vail.workspace == WORKSPACE_ARCHIVE:
+        matches = ClassFileScanner(classnames).scan_archive(search_root)
     else:
-        return False,result
+        matches = {classname: [os.path.relpath(path, search_root) for path in paths]
+                   for classname, paths in ClassFileScanner(classnames).scan_directory(search_root).items()}
+    references = {}
+    for classname in classnames:
+        paths = [class_file_path(search_root, entry, vail) for entry in matches.get(classname, [])]
+        references[classname] = (len(paths) != 0, "".join("Binary file {} matches\n".format(path) for path in paths))
+    return references
+
+
+def class_file_path(search_root, entry, vail):
+    """
+    Names a class file of a JAR in proofs: `<jar>!/<entry>`, or its path in the extracted directory.
+    """
+    if vail.workspace == WORKSPACE_ARCHIVE:
+        return archive_entry_path(search_root, entry)
+    return os.path.join(search_root, entry)
+
+
+def load_class_refs_for(search_root, jar_path, vail):
+    if vail.evidence == EVIDENCE_INDEX and search_root not in vail.class_refs:
+        vail.class_refs[search_root] = load_class_refs(jar_path)
 
 
 
@@ -70,15 +141,16 @@ def valid_missing_log(missing_log,vail):
         vail (Validation): Validation object to store results.
     """
     vail.validate_missing_log["uncollected_first_level"]=vail.uncollected["first_level"]
+    references=find_references(list(missing_log["missing_deps"].keys()), vail.unjar_dir, vail)
     for used_class in missing_log["missing_deps"].keys():
-        existing_flag,result=is_existed(used_class,  vail.unjar_dir)
+        existing_flag,result=references[used_class]
         if existing_flag:
             if len(vail.validate_missing_log["uncollected_first_level"])==0:
                 vail.validate_missing_log["validate_missing_deps"][used_class]["flag"]="true"
-                vail.validate_missing_log["validate_missing_deps"][used_class]["proof"]=result.stdout
+                vail.validate_missing_log["validate_missing_deps"][used_class]["proof"]=result
             else:
                 vail.validate_missing_log["validate_missing_deps"][used_class]["flag"]="Undetermined"
-                vail.validate_missing_log["validate_missing_deps"][used_class]["proof"]=result.stdout
+                vail.validate_missing_log["validate_missing_deps"][used_class]["proof"]=result
  
 
 def valid_incorrect_log(incorrect_log,vail):   
@@ -90,17 +162,20 @@ def valid_incorrect_log(incorrect_log,vail):
         vail (Validation): Validation object to store results.
     """
     vail.validate_incorrect_log["unresolved_first_level"]=vail.unresolved["first_level"]
+    classnames=[classname for incorrect_dep in incorrect_log["incorrect_deps"]
+                for classname in incorrect_log["incorrect_deps"][incorrect_dep]["provided_packages"] if len(classname)!=0]
+    references=find_references(classnames, vail.unjar_dir, vail)
     for incorrect_dep in incorrect_log["incorrect_deps"]:
         existing_list={}
         not_existing_list={}
         for classname in incorrect_log["incorrect_deps"][incorrect_dep]["provided_packages"]:
             if len(classname)==0:
                 continue
-            existing_flag,result=is_existed(classname,  vail.unjar_dir)
+            existing_flag,result=references[classname]
             if existing_flag:
-                existing_list[classname]=result.stdout
+                existing_list[classname]=result
             else:
-                not_existing_list[classname]=result.stdout
+                not_existing_list[classname]=result
                 
         if existing_list: 
             pass
@@ -117,45 +192,78 @@ def valid_incorrect_log(incorrect_log,vail):
 
 
 
-def get_shortest_jar(directory):
-    search_path = os.path.join(directory, '*.jar')
-    jar_list = glob.glob(search_path, recursive=True)
-    if len(jar_list)==0:
-        return None
-    shortest_filename = min(jar_list, key=len)
-    return shortest_filename
+def get_dep_jar(coordinate,vail):
+    """
+    Returns the JAR of a dependency: the same jar jarpkgtags tagged for this coordinate.
+    """
+    dep_dir="./metaDB//maven_asset_deps/" + coordinate.replace("|","/")+"/"
+    return vail.primary_jars.get(dep_dir)
+
 
 def create_search_workspace(from_,vail):
     """
-    Creates a workspace for analyzing dependencies by unzipping a JAR file.
+    Creates a workspace for analyzing dependencies. The archive workspace reads the
+    JAR in place; the extract workspace takes its tree from the shared extraction cache.
     
     Args:
         from_ (str): Package path to retrieve the JAR.
         vail (Validation): Validation object with working paths.
         
     Returns:
-        str: Directory path where JAR contents are extracted.
+        str: The JAR in the archive workspace, otherwise the directory where its contents are extracted.
     """
-    from_dir="./metaDB//maven_asset_deps/" + from_.replace("|","/")+"/"
-    from_jar_path=get_shortest_jar(from_dir)
-    jar_name=os.path.basename(from_jar_path)
-    current_dir=vail.work_path+"deps/"+jar_name+"/"
-    search_dir=current_dir+"unjar/"
-
-    #reduce replicated copy operations
-    if os.path.exists(search_dir):
-        return search_dir
-    else:
-        os.makedirs(current_dir,exist_ok=True)
-        shutil.copy(from_jar_path, current_dir)
-        
-        os.makedirs(search_dir,exist_ok=True)
-        with zipfile.ZipFile(current_dir+jar_name, 'r') as zip_ref:
-            zip_ref.extractall(search_dir)
-        return search_dir
+    from_jar_path=get_dep_jar(from_,vail)
+    if vail.workspace==WORKSPACE_ARCHIVE:
+        load_class_refs_for(from_jar_path, from_jar_path, vail)
+        return from_jar_path
+    # extracted once for all audits, held until the end of this one
+    search_dir=vail.extraction_cache.acquire(from_jar_path)
+    load_class_refs_for(search_dir, from_jar_path, vail)
+    return search_dir
 
 
 
+def get_edge_verdict(from_,to_,vail):
+    """
+    Looks up which packages provided by "to_" are used by "from_".
+
+    The verdict only depends on the bytes of the "from_" JAR and the package list of "to_", so
+    it is kept in the metadata store and shared by every audit containing the same edge.
+    Whether "from_" has unresolved dynamic usages is not part of it and is applied by the caller.
+
+    Returns:
+        tuple: (True if a provided package is used, proof: the used packages when there are
+            some, otherwise every package that was looked up).
+    """
+    provided_pkgs= [pkg for pkg in vail.metadata_store.get_packages(to_) or [] if len(pkg)!=0]
+    from_key=vail.jar_digests.get(from_)
+    if from_key is None:
+        from_key=vail.blob_store.digest_of(get_dep_jar(from_,vail))
+        vail.jar_digests[from_]=from_key
+    to_packages=hashlib.sha256("\n".join(provided_pkgs).encode("utf-8")).hexdigest()
+    verdict=vail.metadata_store.get_edge_verdict(from_key, to_, to_packages, vail.analyzer)
+    if verdict is not None:
+        vail.verdict_hits+=1
+        return verdict
+    vail.verdict_misses+=1
+
+    #create search workspace of the "from_" jar
+    search_dir=create_search_workspace(from_,vail)
+    existing_list={}
+    not_existing_list={}
+    references=find_references(provided_pkgs, search_dir, vail)
+    for pkg in provided_pkgs:
+        existing_flag,result = references[pkg]
+        if existing_flag:
+            existing_list[pkg]=result
+        else:
+            not_existing_list[pkg]=result
+    used=len(existing_list)!=0
+    proof=existing_list if used else not_existing_list
+    vail.metadata_store.put_edge_verdict(from_key, to_, to_packages, vail.analyzer, used, proof)
+    return used,proof
+
+
 def determine_dep_relationship_between_fromDeps_and_toDeps(from_,to_,vail):
     """
     Determines dependency relationships between two dependency.
@@ -169,25 +277,13 @@ def determine_dep_relationship_between_fromDeps_and_toDeps(from_,to_,vail):
         dict: Record of the relationship and whether dependencies are resolved.
     """
 
-    #step one: create search workspace and unzip target jar
-    search_dir=create_search_workspace(from_,vail)
-
-    #step two: get all provided packages from "to_"
-    provided_pkgs= vail.jar_to_pkgs_dic[to_]
-    existing_list={}
-    not_existing_list={}
-    for pkg in provided_pkgs:
-        if len(pkg)==0:
-            continue
-        existing_flag,result = is_existed(pkg, search_dir)
-        if existing_flag:
-            existing_list[pkg]=result.stdout
-        else:
-            not_existing_list[pkg]=result.stdout
+    #step one and two: find which provided packages of "to_" are used by "from_", or reuse the verdict of another audit
+    used,proof=get_edge_verdict(from_,to_,vail)
+    not_existing_list=proof
 
     #step three: check if any provided packages from "to_" is actually used by "from_"
     record={}
-    if existing_list: 
+    if used: 
         #record["from"]=from_
         #record["to"]=to_
         #record["flag"]="false"
@@ -226,53 +322,71 @@ def valid_incorrect_transitive_relationship_log(incorrect_transitive_relationshi
         vail.validate_incorrect_transitive_relationship_log["validate_incorrect_transitive_relationship"].append(record)
 
 
+def find_usage_references(items, vail):
+    """
+    Looks up the usages of missing transitive items, one batch per level-2 dependency.
+
+    Returns:
+        dict: node_l2 -> find_references result for its usages.
+    """
+    usages=defaultdict(list)
+    for item_dic in items:
+        usages[item_dic["node_l2"]].append(item_dic["usage"])
+    references={}
+    for node_l2 in usages:
+        search_dir=create_search_workspace(node_l2,vail)
+        references[node_l2]=find_references(usages[node_l2], search_dir, vail)
+    return references
+
+
 def valid_missing_transitive_dependency_log(missing_transitive_dependency_log, vail):
+    references=find_usage_references(missing_transitive_dependency_log["missing_transitive_dependency"], vail)
     for item_dic in missing_transitive_dependency_log["missing_transitive_dependency"]:
-        search_dir=create_search_workspace(item_dic["node_l2"],vail)
-        existing_flag,result=is_existed(item_dic["usage"],  search_dir)
+        existing_flag,result=references[item_dic["node_l2"]][item_dic["usage"]]
         uncollected_deps=vail.uncollected["second_level"][item_dic["node_l2"]] if item_dic["node_l2"] in vail.uncollected["second_level"].keys() else []
 
-        # if didn't find any reference, the missing is false positive
+        # if didn't find any reference, the missing is false positive and is not reported
         if not existing_flag:
-            pass
             #item_dic["flag"]="false"
-            #item_dic["proof"]=result.stdout
+            #item_dic["proof"]=result
+            continue
         else:
             if len(uncollected_deps)!=0:
                 item_dic["flag"]="Undetermined"
-                item_dic["proof"]=result.stdout
+                item_dic["proof"]=result
                 item_dic["uncollected"]=uncollected_deps
             else:
                 item_dic["flag"]="true"
-                item_dic["proof"]=result.stdout
+                item_dic["proof"]=result
         vail.validate_missing_transitive_dependency_log["validate_missing_transitive_dependency"].append(item_dic)        
 
 
 
 def valid_missing_transitive_relationship_log(missing_transitive_relationship_log, vail):
+    references=find_usage_references(missing_transitive_relationship_log["missing_transitive_relationship"], vail)
     for item_dic in missing_transitive_relationship_log["missing_transitive_relationship"]:
-        search_dir=create_search_workspace(item_dic["node_l2"],vail)
-        existing_flag,result=is_existed(item_dic["usage"],  search_dir)
+        existing_flag,result=references[item_dic["node_l2"]][item_dic["usage"]]
         uncollected_deps=vail.uncollected["second_level"][item_dic["node_l2"]] if item_dic["node_l2"] in vail.uncollected["second_level"].keys() else []
 
-        # if didn't find any reference, the missing is false positive
+        # if didn't find any reference, the missing is false positive and is not reported
         if not existing_flag:
-            pass
             #item_dic["flag"]="false"
-            #item_dic["proof"]=result.stdout
+            #item_dic["proof"]=result
+            continue
         else:
             if len(uncollected_deps)!=0:
                 item_dic["flag"]="Undetermined"
-                item_dic["proof"]=result.stdout
+                item_dic["proof"]=result
                 item_dic["uncollected"]=uncollected_deps
             else:
                 item_dic["flag"]="true"
-                item_dic["proof"]=result.stdout
+                item_dic["proof"]=result
         vail.validate_missing_transitive_relationship_log["validate_missing_transitive_relationship"].append(item_dic)        
 
 
 
-def check_sbom_noncompliance(sbom_path,jar_path,mode):
+def check_sbom_noncompliance(sbom_path,jar_path,mode,evidence=EVIDENCE_INDEX,workspace=WORKSPACE_ARCHIVE,
+                             extract_quota=EXTRACTION_CACHE_QUOTA,meta_cache=None):
     """
     Analyzes SBOM and JAR compliance by detecting inconsistencies and validating dependencies.
 
@@ -283,10 +397,18 @@ def check_sbom_noncompliance(sbom_path,jar_path,mode):
     Args:
         sbom_path (str): Path to the SBOM file.
         jar_path (str): Path to the associated JAR file.
+        evidence (str): EVIDENCE_INDEX to look names up in the persisted reference index of each JAR,
+            EVIDENCE_SCAN to scan the class files once per lookup batch.
+        workspace (str): WORKSPACE_ARCHIVE to read classes straight from the JARs,
+            WORKSPACE_EXTRACT to read them from JARs extracted in the shared extraction cache.
+        extract_quota (int): Bytes the extraction cache may take, in the extract workspace.
+        meta_cache (MetaInfoCache, optional): Usage summaries of the artifacts, shared by the
+            audits of one process; pass a MetaInfoCache(maxsize=...) to bound it. A private
+            unbounded cache is used if omitted.
 
     Workflow:
         1. Generate inconsistency results by analyzing the SBOM graph and logging inconsistencies.
-        2. Copy and unzip the JAR file into the evaluation directory for dependency validation.
+        2. In the extract workspace, take the extracted JAR from the shared extraction cache.
         3. Run various validation checks for missing and incorrect dependencies.
         4. Save the validation results to a JSON file and display the results in a table.
 
@@ -310,28 +432,41 @@ def check_sbom_noncompliance(sbom_path,jar_path,mode):
     to_result=root+dir+"/analyze_log.json"
     #print(sbom_path)
     #print(to_graph)
-    analyze_inconsistency(sbom_path, to_graph,to_result,mode)
+    if meta_cache is None:
+        meta_cache=MetaInfoCache()
+    analyze_inconsistency(sbom_path, to_graph,to_result,mode,meta_cache)
+    meta_cache.report()
     
-    ##step two: copy jar file in to evaluation dir and unzip it
-    shutil.copy(jar_path, root+dir)
-    copied_jar=root+dir+"/"+os.path.basename(jar_path)
-    unjar_path=root+dir+"/unjar"
-    os.makedirs(unjar_path,exist_ok=True)
-    with zipfile.ZipFile(copied_jar, 'r') as zip_ref:
-        zip_ref.extractall(unjar_path)
+    ##step two: the archive workspace reads the jar in place, the extract workspace takes it from the extraction cache
+    extraction_cache=None
+    if workspace==WORKSPACE_EXTRACT:
+        extraction_cache=ExtractionCache(quota=extract_quota)
+        unjar_path=extraction_cache.acquire(jar_path)
+    else:
+        unjar_path=jar_path
 
     
     #step three 
     work_path=root+dir+"/"
-    unjar_path=root+dir+"/unjar"
     inconsistency_log=load_json(to_result)
-    vail= Validation(work_path,unjar_path,inconsistency_log["uncollected"],inconsistency_log["unresolved"]) 
-    valid_missing_log(inconsistency_log["missing_log"],vail)
-    valid_incorrect_log(inconsistency_log["incorrect_log"],vail)
-    valid_incorrect_transitive_deps_log(inconsistency_log["incorrect_transitive_deps_log"],vail)
-    valid_incorrect_transitive_relationship_log(inconsistency_log["incorrect_transitive_relationship_log"],vail)
-    valid_missing_transitive_dependency_log(inconsistency_log["missing_transitive_dependency_log"],vail)
-    valid_missing_transitive_relationship_log(inconsistency_log["missing_transitive_relationship_log"],vail)
+    vail= Validation(work_path,unjar_path,inconsistency_log["uncollected"],inconsistency_log["unresolved"],evidence,workspace,
+                     extraction_cache)
+    try:
+        load_class_refs_for(unjar_path, jar_path, vail)
+        valid_missing_log(inconsistency_log["missing_log"],vail)
+        valid_incorrect_log(inconsistency_log["incorrect_log"],vail)
+        valid_incorrect_transitive_deps_log(inconsistency_log["incorrect_transitive_deps_log"],vail)
+        valid_incorrect_transitive_relationship_log(inconsistency_log["incorrect_transitive_relationship_log"],vail)
+        valid_missing_transitive_dependency_log(inconsistency_log["missing_transitive_dependency_log"],vail)
+        valid_missing_transitive_relationship_log(inconsistency_log["missing_transitive_relationship_log"],vail)
+    finally:
+        print("edge verdict cache: {} hits, {} misses".format(vail.verdict_hits, vail.verdict_misses))
+        if extraction_cache is not None:
+            # the trees of this audit may be evicted from now on
+            extraction_cache.release()
+            extraction_cache.report()
+    vail.primary_jars.save()
+    vail.metadata_store.close()
 
 
     # step four: dump the validation result
@@ -1,34 +1,142 @@
 from utils_tool.transitive_download import *
-from utils_tool.construct_transitive_deps import construct_transitive_deps_download_list
+from utils_tool.construct_transitive_deps import construct_transitive_deps_download_list, get_direct_deps
+from utils_tool.crawl_engine import HostRateLimiter, run_crawl
+from utils_tool.http_session import PooledSession, ValidatorCache
+from utils_tool.negative_cache import NegativeCache
+from utils_tool.blob_store import BlobStore
+from utils_tool.artifact_source import LocalRepositorySource, RemoteRepositorySource, fetch_from_sources, probe_from_sources, DEFAULT_LOCAL_REPOSITORY
+from utils_tool.metadata_store import MetadataStore
+from add_jar_to_pkg_dic import add_packages_to_dic
 
-def crawl_assets(sbom_path,root_path):
+STATUS_PROBED = "probed"
+
+def build_sources(local_repos, remote_url, offline, session, validators, negative_cache, refresh):
+    """
+    Builds the ordered list of artifact sources: local Maven-layout repositories
+    first (~/.m2/repository when it exists, then `local_repos`), then the remote
+    repository unless running offline.
+    """
+    default_repo=os.path.expanduser(DEFAULT_LOCAL_REPOSITORY)
+    repos=[default_repo] if os.path.isdir(default_repo) else []
+    for repo in local_repos or []:
+        if repo not in repos:
+            repos.append(repo)
+    sources=[LocalRepositorySource(repo) for repo in repos]
+    if not offline:
+        sources.append(RemoteRepositorySource(remote_url, session=session, validators=validators,
+                                              negative_cache=negative_cache, refresh=refresh))
+    return sources
+
+def crawl_assets(sbom_path,root_path,max_workers=8,rate_per_host=5.0,burst=5,refresh=False,negative_ttl=7*24*3600,
+                 local_repos=None,remote_url=MAVEN_CENTRAL,offline=False,skip_indexed=True,probe=False):
     """
     Downloads all dependencies for a given SBOM file from a Maven repository.
 
     This function reads the dependencies from an SBOM file, constructs the download list,
-    and iteratively downloads each dependency if it does not already exist in the specified
-    directory structure.
+    and fetches every dependency that does not already exist in the specified
+    directory structure on a pool of concurrent workers. Local Maven-layout
+    repositories are tried first; the remote repository is the fallback and is
+    accessed through one pooled HTTP session. Fetched JARs are moved into the
+    content-addressed blob store and referenced from the coordinate tree.
 
     Args:
         sbom_path (str): Path to the SBOM file.
         root_path (str): Root directory where dependencies will be downloaded and stored.
+        max_workers (int): Number of concurrent download workers.
+        rate_per_host (float): Requests per second allowed for each repository host, greater than 0.
+        burst (int): Number of requests a host may receive back to back, at least 1.
+        refresh (bool): Revalidate already downloaded coordinates with conditional
+            requests instead of skipping them.
+        negative_ttl (int): Seconds a coordinate that could not be downloaded is
+            skipped before it is requested again.
+        local_repos (list): Maven-layout directories or file:// URLs to link
+            artifacts from, in addition to ~/.m2/repository when it exists.
+        remote_url (str): Root URL of the remote Maven repository.
+        offline (bool): Never access the remote repository.
+        skip_indexed (bool): Do not download transitive dependencies whose packages
+            are already in the metadata store (e.g. imported from a Maven index).
+            Direct dependencies are always downloaded since their classes are analyzed.
+        probe (bool): For transitive dependencies, only read the ZIP central directory
+            of the JAR (with Range requests, or seek for local files) and record its
+            packages in the metadata store instead of downloading it.
+
+    Returns:
+        CrawlStats: Progress, status counts and per-artifact latency of the crawl.
+
+    Raises:
+        ValueError: If rate_per_host is not positive or burst is below 1.
+
     Note:
-        A sleep interval is used between downloads to prevent overloading the Maven repository.
+        A per-host token bucket, not the worker count, bounds the load put on the
+        Maven repository. Coordinates recorded in the negative cache are not
+        requested again until their entry expires.
     """
 
+    if rate_per_host <= 0:
+        raise ValueError("rate_per_host must be greater than 0, got {}".format(rate_per_host))
+    if burst < 1:
+        raise ValueError("burst must be at least 1, got {}".format(burst))
+
     deps_file=construct_transitive_deps_download_list(sbom_path)
+    direct_deps=get_direct_deps(sbom_path)
+    if direct_deps is None:
+        # without a root every dependency may be analyzed, fetch them all in full
+        print("no root in {}, indexed dependencies are downloaded and not probed".format(sbom_path))
+        skip_indexed=False
+        probe=False
+        direct_deps=[]
+    direct_deps=set(direct_deps)
+    metadata_store=MetadataStore() if skip_indexed else None
+    pending=[]
     for line in deps_file:
         groupId, artifactId, version = line.strip().split('|')
-        # Download each file
         dic_path=root_path+ f"{groupId}/{artifactId}/{version}/"
-        print(dic_path)
-        
-        if os.path.exists(dic_path):
+
+        if metadata_store is not None and line.strip() not in direct_deps and metadata_store.has(line.strip()):
+            continue
+
+        if os.path.exists(dic_path) and not refresh and not has_partial_downloads(dic_path):
             #print("the assets exsit!!!")
             continue
-        
-        download_maven_artifacts(groupId, artifactId, version, dic_path)
-        time.sleep(2)
+        pending.append(line.strip())
+
+    if metadata_store is not None:
+        metadata_store.close()
+
+    session=PooledSession(pool_size=max_workers, rate_limiter=HostRateLimiter(rate_per_host, burst))
+    validators=ValidatorCache()
+    negative_cache=NegativeCache(ttl=negative_ttl)
+    sources=build_sources(local_repos, remote_url, offline, session, validators, negative_cache, refresh)
+    print("artifact sources: {}".format(sources))
+
+    blob_store=BlobStore()
+    probed={}
+
+    def fetch(coordinate):
+        groupId, artifactId, version = coordinate.split('|')
+        dic_path=root_path+ f"{groupId}/{artifactId}/{version}/"
+        if probe and coordinate not in direct_deps:
+            packages=probe_from_sources(sources, groupId, artifactId, version, dic_path)
+            if packages is not None:
+                probed[coordinate]=packages
+                return STATUS_PROBED
+        status=fetch_from_sources(sources, groupId, artifactId, version, dic_path)
+        if status == STATUS_OK:
+            # keep one copy of identical bytes, the coordinate tree only holds references
+            blob_store.ingest_directory(dic_path)
+        return status
+
+    try:
+        stats=run_crawl(pending, fetch, max_workers=max_workers)
+    finally:
+        validators.save()
+        negative_cache.save()
+        session.close()
+        add_packages_to_dic(probed)
+    for coordinate, error in stats.failed:
+        print(f"Failed to crawl {coordinate}: {error}")
+    print("crawl summary: {}".format(stats.summary()))
+    return stats
 
 if __name__ == '__main__':
     sbom_path="./samples/aaa-cli-jar-0.15.2/aaa-cli-jar-0.15.2-cyclonedx.json"
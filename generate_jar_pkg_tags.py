@@ -1,43 +1,148 @@
 import glob, os, json
+import io
+import sys
+import signal
+import contextlib
 import collections
+from importlib.metadata import entry_points
 from tqdm import tqdm
 import subprocess
 import concurrent.futures
+from utils_tool.jar_probe import probe_local_jar, ProbeError
+from utils_tool.primary_jar import PrimaryJarManifest
+from add_jar_to_pkg_dic import add_packages_to_dic
 
 
 
-def run_jar_pkg_tags(file):
-    """
-    Runs the `jarpkgtags` command on a specified JAR file to generate metadata.
+TAG_TIMEOUT = 300
+FAILURE_LOG = "./results/jarpkgtags/failures.json"
 
-    This function processes a JAR file and saves the output metadata in a JSON file. 
-    The directory structure of the output file mirrors the source file path but stores 
-    it under a results directory.
-    """
+# jarpkgtags entry point, resolved once per worker process
+_jarpkgtags_main = None
 
+
+def get_output_file(file):
+    """
+    Returns the meta_info.json path of a JAR. The directory structure of the output
+    file mirrors the source file path but stores it under a results directory.
+    """
     jar_name=file.split("/")[-1]
     if "/metaDB/maven_asset_deps/" in file:
         parent_path=file.split(jar_name)[0].replace("/metaDB/maven_asset_deps/","/results/jarpkgtags/")
     else:
         parent_path=file.split(jar_name)[0].replace("/samples/","/results/jarpkgtags/")
+    return parent_path+"meta_info.json"
+
+
+def load_jarpkgtags_main():
+    """
+    Resolves the `jarpkgtags` console script of the jarpkginfo package, so it can
+    be called in-process instead of starting an interpreter per JAR.
+
+    Returns:
+        callable or None: The entry point, or None if jarpkginfo is not importable.
+    """
+    try:
+        for entry_point in entry_points(group="console_scripts", name="jarpkgtags"):
+            return entry_point.load()
+    except Exception as e:
+        print(f"fail to load jarpkgtags in-process: {e}")
+    return None
+
+
+class TagTimeout(Exception):
+    pass
+
+
+def raise_timeout(signum, frame):
+    raise TagTimeout()
+
 
-    if not os.path.exists(parent_path):
-        os.makedirs(parent_path)
-    output_file=parent_path+"meta_info.json"
-    # specify your command
-    #print(output_file)
+def call_jarpkgtags(file, timeout):
+    """
+    Runs jarpkgtags on a JAR and returns what it prints.
+    """
+    global _jarpkgtags_main
+    if _jarpkgtags_main is None:
+        _jarpkgtags_main = load_jarpkgtags_main() or False
+    if not _jarpkgtags_main:
+        # jarpkginfo is not importable here, fall back to the command line tool
+        process = subprocess.run(["jarpkgtags", file], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
+        if process.returncode != 0:
+            raise RuntimeError(f"jarpkgtags exited with {process.returncode}: {process.stderr.decode(errors='replace')[-500:]}")
+        return process.stdout
+
+    buffer = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+    saved_argv = sys.argv
+    sys.argv = ["jarpkgtags", file]
+    use_alarm = timeout and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, raise_timeout)
+        signal.alarm(int(timeout))
+    try:
+        with contextlib.redirect_stdout(buffer):
+            _jarpkgtags_main()
+    except SystemExit as e:
+        if e.code not in (0, None):
+            raise RuntimeError(f"jarpkgtags exited with {e.code}")
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+        sys.argv = saved_argv
+    buffer.flush()
+    return buffer.buffer.getvalue()
+
+
+def run_jar_pkg_tags(file, timeout=TAG_TIMEOUT):
+    """
+    Runs jarpkgtags on a specified JAR file to generate metadata.
+
+    This function processes a JAR file and saves the output metadata in a JSON file.
+    The file is only written if jarpkgtags succeeds within `timeout` seconds and
+    prints valid JSON, so a crash never leaves an empty meta_info.json behind.
+
+    Returns:
+        str or None: Error description, or None on success.
+    """
+    output_file=get_output_file(file)
     if os.path.exists(output_file):
         #print("existing!")
-        return
-    command = f"jarpkgtags {file}"
-    # run the command
-    process = subprocess.Popen(command, stdout=subprocess.PIPE, shell=True)
-    output, error = process.communicate()
-
+        return None
+    try:
+        output=call_jarpkgtags(file, timeout)
+        json.loads(output)
+    except TagTimeout:
+        return f"timeout after {timeout}s"
+    except subprocess.TimeoutExpired:
+        return f"timeout after {timeout}s"
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
     # open a file and write the output
-    with open(output_file, 'wb') as file:
-        file.write(output)
+    with open(output_file+".tmp", 'wb') as f:
+        f.write(output)
+    os.replace(output_file+".tmp", output_file)
+    return None
+
 
+def record_failures(failures, succeeded):
+    """
+    Keeps the JARs jarpkgtags failed on, with the error, in FAILURE_LOG.
+    """
+    log={}
+    if os.path.exists(FAILURE_LOG):
+        try:
+            with open(FAILURE_LOG, 'r') as f:
+                log=json.load(f)
+        except (OSError, json.JSONDecodeError):
+            log={}
+    for file in succeeded:
+        log.pop(file, None)
+    log.update(failures)
+    os.makedirs(os.path.dirname(FAILURE_LOG), exist_ok=True)
+    with open(FAILURE_LOG, 'w') as f:
+        json.dump(log, f, indent=4)
 
 
 def get_sub_dir(current_directory):
@@ -68,39 +173,148 @@ def get_shortest_jar(directory):
     return file_list
 
 
+def get_primary_jars(directory, coordinates, manifest=None):
+    """
+    Returns the primary JAR of each coordinate, only looking into the folders of
+    these coordinates instead of walking the whole tree.
+
+    Args:
+        directory (str): Root of the <groupId>/<artifactId>/<version>/ tree.
+        coordinates (iterable): "groupId|artifactId|version" entries.
+        manifest (PrimaryJarManifest, optional): Record of the chosen JARs.
+    """
+    own_manifest=manifest is None
+    if own_manifest:
+        manifest=PrimaryJarManifest()
+    file_list=[]
+    for coordinate in coordinates:
+        dic_path=os.path.join(directory, *coordinate.split("|"))
+        if not os.path.isdir(dic_path):
+            continue
+        jar=manifest.get(dic_path)
+        if jar is not None:
+            file_list.append(jar)
+    if own_manifest:
+        manifest.save()
+    return file_list
+
 
 
 
-def batch_process(file_list):
+
+def batch_process(file_list, max_workers=None, timeout=TAG_TIMEOUT):
     """
     Processes a list of JAR files in parallel, generating metadata for each file.
 
+    jarpkgtags runs in-process on a pool of worker processes, with a timeout per JAR.
+    Failures are reported and kept in FAILURE_LOG instead of producing empty metadata.
+
     Args:
         file_list (list): List of paths to JAR files to process.
+        max_workers (int, optional): Number of worker processes (default: CPU count).
+        timeout (int): Seconds allowed for one JAR.
+    """
+    file_list=[f for f in file_list if not os.path.exists(get_output_file(f))]
+    if len(file_list)==0:
+        return
+    failures={}
+    succeeded=[]
+    max_workers=max_workers or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(max_workers, len(file_list))) as executor:
+        futures={executor.submit(run_jar_pkg_tags, file, timeout): file for file in file_list}
+        for future in tqdm(concurrent.futures.as_completed(futures), total=len(futures)):
+            file=futures[future]
+            try:
+                error=future.result()
+            except Exception as e:
+                # e.g. the worker process died
+                error=f"{type(e).__name__}: {e}"
+            if error is None:
+                succeeded.append(file)
+            else:
+                failures[file]=error
+                print(f"jarpkgtags failed on {file}: {error}")
+    record_failures(failures, succeeded)
+
+
+def generate_pkgs_for_sbom(max_workers=None, timeout=TAG_TIMEOUT, coordinates=None):
     """
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        list(tqdm(executor.map(run_jar_pkg_tags, file_list), total=len(file_list)))
+    Generates package tags for JAR files in the SBOM directory by finding and processing each file.
+
+    Args:
+        coordinates (iterable, optional): Only process these samples instead of the whole directory.
+    """
+    directory='./samples/'
+    if coordinates is None:
+        file_list=get_shortest_jar(directory=directory)
+    else:
+        file_list=get_primary_jars(directory, coordinates)
+    batch_process(file_list, max_workers, timeout)
+
 
 
-def generate_pkgs_for_sbom():
+def get_coordinate(file, directory):
     """
-    Generates package tags for JAR files in the SBOM directory by finding and processing each file.
+    Returns "groupId|artifactId|version" of a JAR below a <groupId>/<artifactId>/<version>/ tree.
     """
-    file_list=get_shortest_jar(directory='./samples/')
-    batch_process(file_list)
+    return "|".join(os.path.relpath(file, directory).split(os.sep)[:3])
 
 
+def probe_process(file_list, directory):
+    """
+    Records the packages of JAR files by reading only their ZIP central directory.
 
-def generate_pkgs_for_sbom_deps():
+    Args:
+        file_list (list): List of paths to JAR files to probe.
+        directory (str): Root of the <groupId>/<artifactId>/<version>/ tree holding them.
+    """
+    probed={}
+    for file in tqdm(file_list, desc="Probing jars"):
+        try:
+            probed[get_coordinate(file, directory)]=probe_local_jar(file)
+        except (OSError, ProbeError) as e:
+            print(f"fail to probe {file}: {e}")
+    add_packages_to_dic(probed)
+
+
+def generate_pkgs_for_sbom_deps(probe=False, full_coordinates=(), max_workers=None, timeout=TAG_TIMEOUT, coordinates=None):
     """
     Generates package tags for JAR files in the SBOM dependencies directory by finding and processing each file.
+
+    Args:
+        probe (bool): Only probe the package list of dependencies that are not in
+            `full_coordinates` instead of running jarpkgtags on them.
+        full_coordinates (iterable): Coordinates that always get full metadata;
+            None when they are unknown, then every dependency gets full metadata.
+        max_workers (int, optional): Number of jarpkgtags worker processes.
+        timeout (int): Seconds allowed for one JAR.
+        coordinates (iterable, optional): Only process these dependencies instead of the whole directory.
+    """
+    directory='./metaDB/maven_asset_deps/'
+    if coordinates is None:
+        file_list=get_shortest_jar(directory=directory)
+    else:
+        file_list=get_primary_jars(directory, coordinates)
+    if probe and full_coordinates is not None:
+        full_coordinates=set(full_coordinates)
+        probe_list=[f for f in file_list if get_coordinate(f, directory) not in full_coordinates]
+        file_list=[f for f in file_list if get_coordinate(f, directory) in full_coordinates]
+        probe_process(probe_list, directory)
+    batch_process(file_list, max_workers, timeout)
+
+def generate_jarpkgtags(probe=False, full_coordinates=(), max_workers=None, timeout=TAG_TIMEOUT,
+                        coordinates=None, sample_coordinates=None):
     """
-    file_list=get_shortest_jar(directory='./metaDB/maven_asset_deps/')
-    batch_process(file_list)
+    Generates package tags for the audited JAR and its dependencies.
 
-def generate_jarpkgtags():
-    generate_pkgs_for_sbom()
-    generate_pkgs_for_sbom_deps()
+    Args:
+        coordinates (iterable, optional): Dependencies of the audited SBOM; all
+            cached dependencies are processed if omitted.
+        sample_coordinates (iterable, optional): Coordinates of the audited samples;
+            all samples are processed if omitted.
+    """
+    generate_pkgs_for_sbom(max_workers, timeout, sample_coordinates)
+    generate_pkgs_for_sbom_deps(probe, full_coordinates, max_workers, timeout, coordinates)
 
 
 
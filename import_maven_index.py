@@ -0,0 +1,158 @@
+import gzip
+import struct
+import argparse
+from tqdm import tqdm
+from add_jar_to_pkg_dic import Stats
+from utils_tool.metadata_store import MetadataStore
+from utils_tool.construct_transitive_deps import construct_transitive_deps_download_list
+
+
+# field names of the Maven indexer data format
+FIELD_UINFO = "u"
+FIELD_CLASSNAMES = "c"  # ArtifactInfo.NAMES
+FIELD_DELETED = "del"
+
+# artifacts written to the metadata store per transaction
+BATCH_SIZE = 10000
+
+
+def read_exactly(stream, size):
+    data = stream.read(size)
+    if len(data) != size:
+        raise EOFError("truncated index file")
+    return data
+
+
+def read_index_documents(index_path):
+    """
+    Streams the documents of a Maven indexer data file (nexus-maven-repository-index.gz).
+
+    The file is a (usually gzipped) sequence of Java DataOutput records: a
+    version byte and a timestamp, followed by documents made of
+    (flags, name, value) fields. Only one document is held in memory at a
+    time, so multi-gigabyte exports are read in bounded memory.
+
+    Args:
+        index_path (str): Path to the index data file, gzipped or not.
+
+    Yields:
+        dict: Field name -> value of one document.
+    """
+    with open(index_path, 'rb') as f:
+        gzipped = f.read(2) == b"\x1f\x8b"
+    opener = gzip.open if gzipped else open
+    with opener(index_path, 'rb') as stream:
+        version = read_exactly(stream, 1)[0]
+        if version != 1:
+            raise ValueError(f"unsupported index data version {version}")
+        read_exactly(stream, 8)  # timestamp
+
+        while True:
+            header = stream.read(4)
+            if len(header) == 0:
+                return
+            if len(header) != 4:
+                raise EOFError("truncated index file")
+            (field_count,) = struct.unpack(">i", header)
+            document = {}
+            for _ in range(field_count):
+                read_exactly(stream, 1)  # flags
+                (name_length,) = struct.unpack(">H", read_exactly(stream, 2))
+                name = read_exactly(stream, name_length).decode("utf-8", errors="replace")
+                (value_length,) = struct.unpack(">i", read_exactly(stream, 4))
+                value = read_exactly(stream, value_length).decode("utf-8", errors="replace")
+                document[name] = value
+            yield document
+
+
+def parse_uinfo(uinfo):
+    """
+    Splits a UINFO value "groupId|artifactId|version|classifier[|extension]".
+
+    Returns:
+        tuple: (purl "groupId|artifactId|version", classifier, extension).
+    """
+    parts = uinfo.split("|")
+    if len(parts) < 4:
+        return None, None, None
+    extension = parts[4] if len(parts) > 4 else "jar"
+    return "|".join(parts[:3]), parts[3], extension
+
+
+def packages_from_classnames(classnames):
+    """
+    Derives the package names from a newline-separated list of class names
+    such as "/org/example/Foo" or "org/example/Foo$Inner".
+    """
+    packages = set()
+    for classname in classnames.split("\n"):
+        classname = classname.strip().strip("/")
+        if "/" not in classname:
+            continue
+        packages.add(classname.rsplit("/", 1)[0].replace("/", "."))
+    return packages
+
+
+def import_index(store, stat, index_path, coordinates=None):
+    """
+    Add entries to the metadata store from the class names listed in a Maven index file.
+
+    Args:
+        store (MetadataStore): Package lists keyed by "groupId|artifactId|version".
+        stat (Stats): Counters of the import.
+        index_path (str): Path to the index data file.
+        coordinates (set, optional): Only import these coordinates.
+
+    Returns:
+        MetadataStore: The enlarged store.
+    """
+    batch = {}
+    for document in tqdm(read_index_documents(index_path), desc="Reading index", unit=" docs"):
+        stat.total += 1
+        if FIELD_DELETED in document or FIELD_UINFO not in document:
+            continue
+        purl, classifier, extension = parse_uinfo(document[FIELD_UINFO])
+        # only the main jar of an artifact provides its packages
+        if purl is None or classifier != "NA" or extension != "jar":
+            continue
+        if coordinates is not None and purl not in coordinates:
+            continue
+        if purl in batch or store.has(purl):
+            continue
+        if FIELD_CLASSNAMES not in document:
+            stat.no_logs_count += 1
+            continue
+
+        pkg_list = sorted(packages_from_classnames(document[FIELD_CLASSNAMES]))
+        if not pkg_list:
+            stat.package_list_is_empty_count += 1
+        batch[purl] = pkg_list
+        if len(batch) >= BATCH_SIZE:
+            stat.add_dic_from_new += store.add_many(batch)
+            batch = {}
+    stat.add_dic_from_new += store.add_many(batch)
+    return store
+
+
+def import_maven_index(index_path, sbom_path=None):
+    """
+    Pre-populate the metadata store from a local Maven index file, so that
+    covered dependencies need neither a download nor a jarpkgtags run.
+
+    Args:
+        index_path (str): Path to the index data file.
+        sbom_path (str, optional): Only import the coordinates of this SBOM.
+    """
+    coordinates = set(construct_transitive_deps_download_list(sbom_path)) if sbom_path else None
+    stat = Stats()
+    with MetadataStore() as store:
+        import_index(store, stat, index_path, coordinates)
+    print(f"Read {stat.total} index documents, added {stat.add_dic_from_new} new metadata entries.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Import package lists from a Maven index file into the metaDB.")
+    parser.add_argument('--index_path', type=str, required=True, help="Path to nexus-maven-repository-index.gz")
+    parser.add_argument('--sbom_path', type=str, default=None, help="Only import the dependencies of this SBOM")
+    args = parser.parse_args()
+    import_maven_index(args.index_path, args.sbom_path)
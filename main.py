@@ -1,7 +1,10 @@
 from crawl_deps import crawl_assets
-from generate_jar_pkg_tags import generate_jarpkgtags
+from generate_jar_pkg_tags import generate_jarpkgtags, TAG_TIMEOUT
 from add_jar_to_pkg_dic import add_to_dic 
-from compliance_check import check_sbom_noncompliance
+from utils_tool.construct_transitive_deps import get_direct_deps, construct_transitive_deps_download_list
+from compliance_check import check_sbom_noncompliance, EVIDENCE_INDEX, EVIDENCE_SCAN, WORKSPACE_ARCHIVE, WORKSPACE_EXTRACT
+from utils_tool.extraction_cache import EXTRACTION_CACHE_QUOTA
+from analyze_inconsistency import MetaInfoCache
 import argparse
 import os
 
@@ -10,22 +13,32 @@ class SearchMode:
     GLOBAL = "global"
     LAYER = "layer"
 
-def audit(sbom_path, jar_path, mode):
+def audit(sbom_path, jar_path, mode, workers=8, rate=5.0, burst=5, refresh=False, local_repos=None, offline=False, probe=False,
+          tag_workers=None, tag_timeout=TAG_TIMEOUT, evidence=EVIDENCE_INDEX,
+          workspace=WORKSPACE_ARCHIVE, extract_quota=EXTRACTION_CACHE_QUOTA, meta_cache=None):
     """
     Perform SBOM and JAR auditing based on the selected mode.
+
+    Audits run in one process can share `meta_cache`, a MetaInfoCache, so that
+    the usage summary of a common dependency is read once for all of them.
     """
     # Step 1: Download all dependencies
     root_path = "./metaDB/maven_asset_deps/"
     if not os.path.exists(root_path):
         os.makedirs(root_path)
-    crawl_assets(sbom_path, root_path)
+    crawl_assets(sbom_path, root_path, max_workers=workers, rate_per_host=rate, burst=burst, refresh=refresh,
+                 local_repos=local_repos, offline=offline, probe=probe)
 
     # Step 2: Run jarpkgtags to generate metadata and add to dictionary if not already stored
-    generate_jarpkgtags()
-    add_to_dic()
+    # only the coordinates of this SBOM are visited, not the whole cache
+    coordinates = construct_transitive_deps_download_list(sbom_path)
+    sample_coordinate = "|".join(sbom_path.split("/")[-4:-1])
+    generate_jarpkgtags(probe, get_direct_deps(sbom_path), tag_workers, tag_timeout,
+                        coordinates=coordinates, sample_coordinates=[sample_coordinate])
+    add_to_dic(coordinates + [sample_coordinate])
     
     # Step 3: Check for non-compliance issues
-    check_sbom_noncompliance(sbom_path, jar_path, mode)
+    check_sbom_noncompliance(sbom_path, jar_path, mode, evidence, workspace, extract_quota, meta_cache)
 
 
 if __name__ == '__main__':
@@ -40,8 +53,43 @@ if __name__ == '__main__':
     parser.add_argument('-m', '--mode', type=str, choices=[SearchMode.GLOBAL, SearchMode.LAYER], 
                         default=SearchMode.GLOBAL, help="Comparison mode: 'global' (default) or 'layer'")
 
+    # Crawler concurrency and politeness budget
+    parser.add_argument('--workers', type=int, default=8, help="Number of concurrent download workers")
+    parser.add_argument('--rate', type=float, default=5.0, help="Requests per second allowed for each repository host")
+    parser.add_argument('--burst', type=int, default=5, help="Number of requests a repository host may receive back to back")
+    parser.add_argument('--refresh', action='store_true', help="Revalidate already downloaded dependencies with conditional requests")
+    parser.add_argument('--local_repo', action='append', default=None,
+                        help="Additional Maven-layout directory or file:// mirror to take dependencies from before the remote repository (repeatable, ~/.m2/repository is always used when it exists)")
+    parser.add_argument('--offline', action='store_true', help="Only use local repositories, never access the remote repository")
+    parser.add_argument('--probe', action='store_true',
+                        help="Only read the package list (ZIP central directory) of transitive dependencies instead of downloading and tagging them")
+
+    # jarpkgtags worker pool
+    parser.add_argument('--tag_workers', type=int, default=None, help="Number of jarpkgtags worker processes (default: CPU count)")
+    parser.add_argument('--tag_timeout', type=int, default=TAG_TIMEOUT, help="Seconds allowed for jarpkgtags on one JAR")
+
+    # Usage summaries read by the analysis
+    parser.add_argument('--meta_cache_size', type=int, default=None,
+                        help="Maximum number of artifact usage summaries kept in memory by the audit (default: unbounded)")
+
+    # How validation finds the class files referring to a package
+    parser.add_argument('--evidence', type=str, choices=[EVIDENCE_INDEX, EVIDENCE_SCAN], default=EVIDENCE_INDEX,
+                        help="'index' (default): persisted constant-pool reference index of each JAR; 'scan': one multi-pattern scan of the class files per lookup batch")
+    parser.add_argument('--workspace', type=str, choices=[WORKSPACE_ARCHIVE, WORKSPACE_EXTRACT], default=WORKSPACE_ARCHIVE,
+                        help="'archive' (default): read classes straight from the JARs; 'extract': read them from JARs extracted in the shared extraction cache")
+    parser.add_argument('--extract_cache_mb', type=int, default=EXTRACTION_CACHE_QUOTA // 1024 ** 2,
+                        help="Disk quota of the extraction cache in MiB, with --workspace extract (default: 10240)")
+
     # Parse the arguments from the command line
     args = parser.parse_args()
+    if args.rate <= 0:
+        parser.error("--rate must be greater than 0")
+    if args.burst < 1:
+        parser.error("--burst must be at least 1")
+    if args.meta_cache_size is not None and args.meta_cache_size < 1:
+        parser.error("--meta_cache_size must be at least 1")
 
     # Pass the command-line arguments to the audit function
-    audit(args.sbom_path, args.jar_path, args.mode)
+    audit(args.sbom_path, args.jar_path, args.mode, args.workers, args.rate, args.burst, args.refresh, args.local_repo, args.offline, args.probe,
+          args.tag_workers, args.tag_timeout, args.evidence, args.workspace,
+          args.extract_cache_mb * 1024 ** 2, MetaInfoCache(maxsize=args.meta_cache_size))
@@ -0,0 +1,106 @@
+import os
+import json
+import struct
+import zipfile
+
+from compliance_check import check_sbom_noncompliance, get_edge_verdict, Validation
+from utils_tool.blob_store import BlobStore
+from utils_tool.metadata_store import MetadataStore
+
+
+def class_file(*names):
+    """
+    Builds a class file whose constant pool holds the given names as Utf8 constants.
+    """
+    data = b"\xca\xfe\xba\xbe" + struct.pack(">HHH", 0, 52, len(names) + 1)
+    for name in names:
+        encoded = name.encode("utf-8")
+        data += b"\x01" + struct.pack(">H", len(encoded)) + encoded
+    return data
+
+
+def write_jar(path, classes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with zipfile.ZipFile(path, 'w') as zip_ref:
+        for entry, names in classes.items():
+            zip_ref.writestr(entry, class_file(*names))
+
+
+def write_meta_info(coordinate, uses):
+    directory = os.path.join("results", "jarpkgtags", *coordinate.split("|"))
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "meta_info.json"), 'w') as f:
+        json.dump({"packages": {"own." + coordinate.split("|")[1]: {"uses": uses}}}, f)
+
+
+def purl(coordinate):
+    group, artifact, version = coordinate.split("|")
+    return "pkg:maven/{}/{}@{}?type=jar".format(group, artifact, version)
+
+
+def test_audit_with_missing_transitive_findings_completes(tmp_path, monkeypatch):
+    # app -> liba -> libc, app -> libb -> libe
+    monkeypatch.chdir(tmp_path)
+    app, liba, libb, libc, libe = ["org.demo|{}|1.0".format(name) for name in ("app", "liba", "libb", "libc", "libe")]
+    sample_dir = "./samples/org.demo/app/1.0/"
+    os.makedirs(sample_dir)
+    sbom = {"dependencies": [
+        {"ref": purl(app), "dependsOn": [purl(liba), purl(libb)]},
+        {"ref": purl(liba), "dependsOn": [purl(libc)]},
+        {"ref": purl(libb), "dependsOn": [purl(libe)]},
+        {"ref": purl(libc), "dependsOn": []},
+        {"ref": purl(libe), "dependsOn": []},
+    ]}
+    with open(sample_dir + "app-1.0-cyclonedx.json", 'w') as f:
+        json.dump(sbom, f)
+    jar_path = sample_dir + "app-1.0.jar"
+    write_jar(jar_path, {"own/app/Main.class": ["org/a/A", "org/b/B"]})
+
+    with MetadataStore() as store:
+        store.add_many({liba: ["org.a"], libb: ["org.b"], libc: ["org.c"], libe: ["org.e"], "org.demo|libd|1.0": ["org.d"]})
+    write_meta_info(app, ["org.a", "org.b"])
+    # org.d is provided by no node, org.e only under libb, org.f by nothing and never referenced
+    write_meta_info(liba, ["org.c", "org.d", "org.e", "org.f"])
+    write_meta_info(libb, ["org.e"])
+    write_jar("./metaDB/maven_asset_deps/org.demo/liba/1.0/liba-1.0.jar",
+              {"own/liba/A.class": ["org/c/C", "org/d/D", "org/e/E"]})
+    write_jar("./metaDB/maven_asset_deps/org.demo/libb/1.0/libb-1.0.jar",
+              {"own/libb/B.class": ["org/e/E"]})
+
+    check_sbom_noncompliance(sample_dir + "app-1.0-cyclonedx.json", jar_path, "layer")
+
+    with open("./results/audit_results/org.demo/app/1.0/compliance_result.json") as f:
+        result = json.load(f)
+    missing = result["M2:Missing Transitive Dependency"]["validate_missing_transitive_dependency"]
+    relationships = result["M3: Missing Transitive Relationship"]["validate_missing_transitive_relationship"]
+    assert [(item["node_l2"], item["usage"], item["flag"]) for item in missing] == [(liba, "org.d", "true")]
+    assert [(item["node_l2"], item["usage"], item["flag"]) for item in relationships] == [(liba, "org.e", "true")]
+
+
+def test_edge_verdicts_are_shared_between_audits(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_jar("./metaDB/maven_asset_deps/g/a/1/a-1.jar", {"own/a/A.class": ["org/b/B"]})
+    with MetadataStore() as store:
+        store.add_many({"g|b|1": ["org.b"], "g|c|1": ["org.c"]})
+    digests = []
+    original_digest_of = BlobStore.digest_of
+    monkeypatch.setattr(BlobStore, "digest_of", lambda self, path: digests.append(path) or original_digest_of(self, path))
+
+    verdicts = []
+    for _ in range(2):
+        vail = Validation("./", "unused.jar", {"first_level": [], "second_level": {}}, {"first_level": [], "second_level": {}})
+        verdicts.append([get_edge_verdict("g|a|1", to_, vail)[0] for to_ in ("g|b|1", "g|c|1")])
+        vail.metadata_store.close()
+
+    assert verdicts == [[True, False], [True, False]]
+    # answered from the cache, and the source JAR is hashed once per audit
+    assert (vail.verdict_hits, vail.verdict_misses) == (2, 0)
+    assert len(digests) == 2
+
+    # a verdict computed on another package list of the target is not reused
+    with MetadataStore() as store:
+        store.add_many({"g|c|1": ["org.c", "org.b"]}, replace=True)
+    vail = Validation("./", "unused.jar", {"first_level": [], "second_level": {}}, {"first_level": [], "second_level": {}})
+    assert get_edge_verdict("g|a|1", "g|c|1", vail)[0]
+    assert (vail.verdict_hits, vail.verdict_misses) == (0, 1)
+    vail.metadata_store.close()
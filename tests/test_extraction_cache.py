@@ -0,0 +1,70 @@
+import os
+import json
+import zipfile
+import subprocess
+
+from utils_tool.extraction_cache import ExtractionCache, INDEX_FILE
+
+
+def write_jar(path, size):
+    with zipfile.ZipFile(path, 'w') as zip_ref:
+        zip_ref.writestr("p/A.class", os.urandom(size))
+    return path
+
+
+def dead_pid():
+    process = subprocess.Popen(["true"])
+    process.wait()
+    return process.pid
+
+
+def read_index(cache):
+    with open(os.path.join(cache.root, INDEX_FILE)) as f:
+        return json.load(f)
+
+
+def test_a_jar_is_extracted_once(tmp_path):
+    jar = write_jar(str(tmp_path / "a.jar"), 1000)
+    first = ExtractionCache(root=str(tmp_path / "cache"))
+    tree = first.acquire(jar)
+    assert os.path.isfile(os.path.join(tree, "p", "A.class"))
+    first.release()
+
+    second = ExtractionCache(root=str(tmp_path / "cache"))
+    assert second.acquire(jar) == tree
+    second.release()
+    assert (first.misses, second.hits) == (1, 1)
+    assert read_index(second)["entries"][second.blob_store.digest_of(jar)]["holds"] == {}
+
+
+def test_least_recently_used_trees_that_nobody_holds_are_evicted(tmp_path):
+    jars = [write_jar(str(tmp_path / "{}.jar".format(name)), 1000) for name in ("a", "b")]
+    cache = ExtractionCache(root=str(tmp_path / "cache"), quota=1500)
+    first = cache.acquire(jars[0])
+    # over quota, but the first tree is still held by this audit
+    second = cache.acquire(jars[1])
+    assert os.path.isdir(first) and os.path.isdir(second)
+
+    cache.release()
+    assert not os.path.isdir(first)
+    assert os.path.isdir(second)
+
+
+def test_stale_extractions_and_untracked_trees_are_swept(tmp_path):
+    cache = ExtractionCache(root=str(tmp_path / "cache"))
+    live = subprocess.Popen(["sleep", "30"])
+    try:
+        for name in ("digest.{}.tmp".format(dead_pid()), "digest.{}.tmp".format(live.pid), "untracked"):
+            os.makedirs(os.path.join(cache.root, name, "unjar"))
+            with open(os.path.join(cache.root, name, "unjar", "f"), 'wb') as f:
+                f.write(b"x" * 700)
+
+        with cache.locked_index() as index:
+            in_progress = cache.sweep(index["entries"])
+
+        assert in_progress == 700
+        assert sorted(name for name in os.listdir(cache.root) if os.path.isdir(os.path.join(cache.root, name))) == \
+            ["digest.{}.tmp".format(live.pid)]
+    finally:
+        live.kill()
+        live.wait()
@@ -0,0 +1,62 @@
+import json
+
+from utils_tool.metadata_store import MetadataStore
+
+
+def open_store(tmp_path, legacy_json_path=None):
+    return MetadataStore(str(tmp_path / "metadata.db"), legacy_json_path)
+
+
+def test_package_lists_keep_their_order_and_are_replaced_on_request(tmp_path):
+    with open_store(tmp_path) as store:
+        assert store.add_many({"g|a|1": ["org.b", "org.a", "org.b"]}) == 1
+        assert store.get_packages("g|a|1") == ["org.b", "org.a"]
+        assert store.has("g|a|1")
+        assert not store.has("g|missing|1")
+        assert store.get_packages("g|missing|1") is None
+
+        assert store.add_many({"g|a|1": ["org.c"]}) == 0
+        assert store.get_packages("g|a|1") == ["org.b", "org.a"]
+        assert store.add_many({"g|a|1": ["org.c"]}, replace=True) == 1
+        assert store.get_packages("g|a|1") == ["org.c"]
+
+    with open_store(tmp_path) as store:
+        assert store.get_packages("g|a|1") == ["org.c"]
+
+
+def test_providers_follow_the_package_lists(tmp_path):
+    with open_store(tmp_path) as store:
+        store.add_many({"g|b|1": ["org.shared"], "g|a|1": ["org.shared", "org.a"]})
+        assert store.providers("org.shared") == ["g|a|1", "g|b|1"]
+        assert store.providers("org.a") == ["g|a|1"]
+        assert store.providers("org.unknown") == []
+
+        store.add_many({"g|a|1": ["org.a"]}, replace=True)
+        assert store.providers("org.shared") == ["g|b|1"]
+
+
+def test_usage_summaries_and_edge_verdicts_round_trip(tmp_path):
+    with open_store(tmp_path) as store:
+        assert store.get_usage_summary("g|a|1") is None
+        store.put_usage_summaries({"g|a|1": {"usage": ["org.b"]}})
+        assert store.get_usage_summary("g|a|1") == {"usage": ["org.b"]}
+
+        assert store.get_edge_verdict("digest", "g|b|1", "packages", "1/index/archive") is None
+        store.put_edge_verdict("digest", "g|b|1", "packages", "1/index/archive", True, {"org.b": "proof"})
+        assert store.get_edge_verdict("digest", "g|b|1", "packages", "1/index/archive") == (True, {"org.b": "proof"})
+        # another package list of the target or other settings are other verdicts
+        assert store.get_edge_verdict("digest", "g|b|1", "other packages", "1/index/archive") is None
+        assert store.get_edge_verdict("digest", "g|b|1", "packages", "1/scan/archive") is None
+
+
+def test_legacy_mapping_is_migrated_when_the_store_is_created(tmp_path):
+    legacy_json_path = tmp_path / "jar_to_pkgs_dic.json"
+    legacy_json_path.write_text(json.dumps({"g|a|1": ["org.a"], "g|b|1": []}))
+    with open_store(tmp_path, str(legacy_json_path)) as store:
+        assert store.get_packages("g|a|1") == ["org.a"]
+        assert store.get_packages("g|b|1") == []
+
+    # an existing store is not migrated again
+    legacy_json_path.write_text(json.dumps({"g|c|1": ["org.c"]}))
+    with open_store(tmp_path, str(legacy_json_path)) as store:
+        assert not store.has("g|c|1")
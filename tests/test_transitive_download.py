@@ -0,0 +1,157 @@
+import os
+import json
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from utils_tool.http_session import PooledSession
+from utils_tool.negative_cache import NegativeCache, REASON_NOT_FOUND
+from utils_tool.artifact_source import RemoteRepositorySource
+from utils_tool.transitive_download import stream_download, ChecksumError
+
+
+ETAG = '"v1"'
+
+
+class StandInRepository(BaseHTTPRequestHandler):
+    """
+    Maven repository stand-in serving `files`, with Range/If-Range support and HTML folder listings.
+    A path in `drops` is cut off after that many bytes the first time it is served.
+    """
+    files = {}
+    drops = {}
+    requests = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get("Range"), self.headers.get("If-Range")))
+        if self.path.endswith("/"):
+            names = [path[len(self.path):] for path in self.files if path.startswith(self.path)]
+            if not names:
+                return self.send_error(404)
+            body = "".join('<a href="{0}">{0}</a>\n'.format(name) for name in names).encode("utf-8")
+            return self.send_body(200, body)
+        data = self.files.get(self.path)
+        if data is None:
+            return self.send_error(404)
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range", ETAG) == ETAG:
+            start = int(range_header[len("bytes="):].split("-")[0])
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header("Content-Range", "bytes */{}".format(len(data)))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            return self.send_body(206, data[start:], {"Content-Range": "bytes {}-{}/{}".format(start, len(data) - 1, len(data))})
+        self.send_body(200, data)
+
+    def send_body(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", ETAG)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        drop = self.drops.pop(self.path, None)
+        if drop is not None:
+            # the connection breaks off in the middle of the body
+            self.wfile.write(body[:drop])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def repository():
+    StandInRepository.files = {}
+    StandInRepository.drops = {}
+    StandInRepository.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInRepository)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield "http://127.0.0.1:{}".format(server.server_address[1]), StandInRepository
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def session():
+    session = PooledSession(pool_size=1, retries=0)
+    yield session
+    session.close()
+
+
+def sha1_of(data):
+    return lambda: ("sha1", hashlib.sha1(data).hexdigest())
+
+
+def test_dropped_transfer_is_resumed_with_a_range_request(repository, session, tmp_path):
+    base_url, handler = repository
+    data = os.urandom(300 * 1024)
+    handler.files["/g/a/1/a-1.jar"] = data
+    handler.drops["/g/a/1/a-1.jar"] = 100 * 1024
+    file_path = str(tmp_path / "a-1.jar")
+
+    status = stream_download(session, base_url + "/g/a/1/a-1.jar", file_path, checksum=sha1_of(data))
+
+    assert status == 200
+    with open(file_path, 'rb') as f:
+        assert f.read() == data
+    # the first request is a plain GET, the second resumes after the bytes that were kept
+    (first_range, _), (resumed_range, if_range) = [request[1:] for request in handler.requests]
+    assert first_range is None
+    assert 0 < int(resumed_range[len("bytes="):-1]) <= 100 * 1024
+    assert if_range == ETAG
+    assert not os.path.exists(file_path + ".part")
+    assert not os.path.exists(file_path + ".part.json")
+
+
+def test_partial_file_not_fitting_the_artifact_anymore_is_downloaded_again(repository, session, tmp_path):
+    base_url, handler = repository
+    data = os.urandom(10 * 1024)
+    handler.files["/g/a/1/a-1.jar"] = data
+    file_path = str(tmp_path / "a-1.jar")
+    # a partial file longer than the artifact: the range answers 416
+    with open(file_path + ".part", 'wb') as f:
+        f.write(os.urandom(20 * 1024))
+    with open(file_path + ".part.json", 'w') as f:
+        json.dump({"url": base_url + "/g/a/1/a-1.jar", "etag": ETAG, "last_modified": None, "size": 20 * 1024}, f)
+
+    status = stream_download(session, base_url + "/g/a/1/a-1.jar", file_path)
+
+    assert status == 200
+    with open(file_path, 'rb') as f:
+        assert f.read() == data
+    assert [request[1] for request in handler.requests] == ["bytes={}-".format(20 * 1024), None]
+
+
+def test_checksum_mismatch_leaves_no_file_behind(repository, session, tmp_path):
+    base_url, handler = repository
+    handler.files["/g/a/1/a-1.jar"] = os.urandom(10 * 1024)
+    file_path = str(tmp_path / "a-1.jar")
+
+    with pytest.raises(ChecksumError):
+        stream_download(session, base_url + "/g/a/1/a-1.jar", file_path, checksum=sha1_of(b"other bytes"))
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_missing_coordinate_is_answered_from_the_negative_cache(repository, session, tmp_path):
+    base_url, handler = repository
+    negative_cache = NegativeCache(path=str(tmp_path / "negative_cache.json"))
+    source = RemoteRepositorySource(base_url + "/", session=session, negative_cache=negative_cache)
+    dic_path = str(tmp_path / "g" / "a" / "1") + "/"
+
+    assert source.fetch("g", "a", "1", dic_path) == REASON_NOT_FOUND
+    requests_sent = len(handler.requests)
+    assert requests_sent > 0
+    assert not os.path.exists(dic_path)
+
+    negative_cache.save()
+    source.negative_cache = NegativeCache(path=str(tmp_path / "negative_cache.json"))
+    assert source.fetch("g", "a", "1", dic_path) == REASON_NOT_FOUND
+    assert len(handler.requests) == requests_sent
@@ -0,0 +1,170 @@
+import os
+import zipfile
+import requests
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+from utils_tool.helper import link_file
+from utils_tool.http_session import get_default_session
+from utils_tool.transitive_download import download_maven_artifacts, skip_check, STATUS_OK, MAVEN_CENTRAL
+from utils_tool.negative_cache import REASON_NOT_FOUND, REASON_NO_JAR, REASON_ERROR
+from utils_tool.jar_probe import probe_local_jar, probe_remote_jar, ProbeError
+
+
+DEFAULT_LOCAL_REPOSITORY = "~/.m2/repository"
+
+
+class LocalRepositorySource:
+    """
+    Serves artifacts from a Maven-layout directory on disk, such as a populated
+    ~/.m2/repository or a mirror snapshot given as a path or a file:// URL.
+
+    JARs are hard-linked (or reflinked) into the coordinate tree, so a warmed
+    agent crawls without network access and without copying bytes.
+
+    Attributes:
+        root (str): Root directory of the repository.
+    """
+    remote = False
+
+    def __init__(self, root):
+        if root.startswith("file://"):
+            root = url2pathname(urlparse(root).path)
+        self.root = os.path.abspath(os.path.expanduser(root))
+
+    def __repr__(self):
+        return f"LocalRepositorySource({self.root})"
+
+    def fetch(self, groupId, artifactId, version, dic_path):
+        folder = os.path.join(self.root, *groupId.split("."), artifactId, version)
+        if not os.path.isdir(folder):
+            return REASON_NOT_FOUND
+
+        jars = [f for f in os.listdir(folder)
+                if f.endswith(".jar") and not skip_check(f) and zipfile.is_zipfile(os.path.join(folder, f))]
+        if len(jars) == 0:
+            return REASON_NO_JAR
+        # mirror the remote resolution: the canonical JAR if present, otherwise every JAR
+        canonical = f"{artifactId}-{version}.jar"
+        if canonical in jars:
+            jars = [canonical]
+
+        if not os.path.exists(dic_path):
+            os.makedirs(dic_path)
+        for jar in jars:
+            link_file(os.path.join(folder, jar), dic_path + jar)
+        return STATUS_OK
+
+    def probe(self, groupId, artifactId, version):
+        """
+        Returns the packages of the canonical JAR from its central directory, or None.
+        """
+        jar_path = os.path.join(self.root, *groupId.split("."), artifactId, version, f"{artifactId}-{version}.jar")
+        if not os.path.exists(jar_path):
+            return None
+        try:
+            return probe_local_jar(jar_path)
+        except (OSError, ProbeError):
+            return None
+
+
+class RemoteRepositorySource:
+    """
+    Downloads artifacts from a remote Maven repository.
+
+    Coordinates recorded in the negative cache are answered from it without
+    any request; new failures are recorded there.
+
+    Attributes:
+        base_url (str): Root URL of the repository.
+        session (PooledSession): Shared pooled session.
+        validators (ValidatorCache): ETag/Last-Modified store for conditional requests.
+        negative_cache (NegativeCache): Store of known-missing coordinates.
+        refresh (bool): Revalidate already downloaded JARs.
+    """
+    remote = True
+
+    def __init__(self, base_url=MAVEN_CENTRAL, session=None, validators=None, negative_cache=None, refresh=False):
+        self.base_url = base_url
+        self.session = session
+        self.validators = validators
+        self.negative_cache = negative_cache
+        self.refresh = refresh
+
+    def __repr__(self):
+        return f"RemoteRepositorySource({self.base_url})"
+
+    def fetch(self, groupId, artifactId, version, dic_path):
+        coordinate = f"{groupId}|{artifactId}|{version}"
+        if self.negative_cache is not None:
+            entry = self.negative_cache.lookup(coordinate)
+            if entry is not None:
+                return entry["reason"]
+        try:
+            status = download_maven_artifacts(groupId, artifactId, version, dic_path,
+                                              session=self.session, validators=self.validators,
+                                              refresh=self.refresh, base_url=self.base_url)
+        except requests.RequestException as e:
+            if self.negative_cache is not None:
+                self.negative_cache.record(coordinate, REASON_ERROR, repr(e))
+            raise
+        if self.negative_cache is not None:
+            if status == STATUS_OK:
+                self.negative_cache.forget(coordinate)
+            else:
+                self.negative_cache.record(coordinate, status)
+        return status
+
+    def probe(self, groupId, artifactId, version):
+        """
+        Returns the packages of the canonical JAR by fetching only its central
+        directory with Range requests, or None if it cannot be probed.
+        """
+        coordinate = f"{groupId}|{artifactId}|{version}"
+        if self.negative_cache is not None and self.negative_cache.lookup(coordinate) is not None:
+            return None
+        if version.endswith("-SNAPSHOT"):
+            return None
+        base_url = self.base_url if self.base_url.endswith("/") else self.base_url + "/"
+        url = f"{base_url}{groupId.replace('.', '/')}/{artifactId}/{version}/{artifactId}-{version}.jar"
+        try:
+            packages, _ = probe_remote_jar(self.session or get_default_session(), url)
+        except (requests.RequestException, ProbeError) as e:
+            print(f"Fail to probe {url}: {e}")
+            return None
+        return packages
+
+
+def probe_from_sources(sources, groupId, artifactId, version, dic_path):
+    """
+    Returns the packages of a coordinate without downloading its JAR: from a
+    JAR already in `dic_path`, otherwise from the first source able to probe it.
+
+    Returns:
+        set or None: Package names, or None if no source could probe the JAR.
+    """
+    jar_path = os.path.join(dic_path, f"{artifactId}-{version}.jar")
+    if os.path.exists(jar_path):
+        try:
+            return probe_local_jar(jar_path)
+        except (OSError, ProbeError):
+            pass
+    for source in sources:
+        packages = source.probe(groupId, artifactId, version)
+        if packages is not None:
+            return packages
+    return None
+
+
+def fetch_from_sources(sources, groupId, artifactId, version, dic_path):
+    """
+    Tries each artifact source in order until one provides the coordinate.
+
+    Returns:
+        str: STATUS_OK, or the reason code reported by the last source.
+    """
+    status = REASON_NOT_FOUND
+    for source in sources:
+        status = source.fetch(groupId, artifactId, version, dic_path)
+        if status == STATUS_OK:
+            return status
+    return status
@@ -0,0 +1,134 @@
+import os
+import json
+import glob
+import hashlib
+import threading
+from utils_tool.helper import link_file
+
+
+BLOB_ROOT = "./metaDB/blobs/"
+REFS_FILE = "blob_refs.json"
+
+
+def file_digest(path, algorithm="sha256"):
+    hasher = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class BlobStore:
+    """
+    Content-addressed store of artifact bytes keyed by SHA-256.
+
+    Every distinct JAR is kept once under `<root>/sha256/<2>/<2>/<digest>`. The
+    coordinate tree only holds hard links (or reflinks) to the blob, and each
+    coordinate folder records the digests of its JARs in `blob_refs.json`.
+
+    Attributes:
+        root (str): Root directory of the store.
+    """
+    def __init__(self, root=BLOB_ROOT):
+        self.root = root
+
+    def blob_path(self, digest):
+        return os.path.join(self.root, "sha256", digest[:2], digest[2:4], digest)
+
+    def put(self, path, digest=None):
+        """
+        Adds the file at `path` to the store and turns `path` into a reference to its blob.
+
+        Returns:
+            str: SHA-256 digest of the file.
+        """
+        digest = digest or file_digest(path)
+        blob = self.blob_path(digest)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        if not os.path.exists(blob):
+            # link under a private name first, concurrent writers of the same blob hold the same bytes
+            tmp_path = "{}.{}.{}.tmp".format(blob, os.getpid(), threading.get_ident())
+            link_file(path, tmp_path)
+            os.replace(tmp_path, blob)
+        if not os.path.samefile(path, blob):
+            # same bytes already stored: drop this copy in favour of the blob
+            tmp_path = path + ".blob"
+            link_file(blob, tmp_path)
+            os.replace(tmp_path, path)
+        self.record_ref(path, digest)
+        return digest
+
+    def record_ref(self, path, digest):
+        directory, name = os.path.split(path)
+        refs = read_refs(directory)
+        if refs.get(name) == digest:
+            return
+        refs[name] = digest
+        refs_path = os.path.join(directory, REFS_FILE)
+        with open(refs_path + ".tmp", 'w') as f:
+            json.dump(refs, f)
+        os.replace(refs_path + ".tmp", refs_path)
+
+    def digest_of(self, path):
+        """
+        Returns the digest of a referenced file, hashing it only if no reference is recorded.
+        """
+        directory, name = os.path.split(path)
+        digest = read_refs(directory).get(name)
+        if digest is None or not os.path.exists(self.blob_path(digest)):
+            digest = file_digest(path)
+        return digest
+
+    def ingest_directory(self, dic_path):
+        """
+        Adds the JARs of one coordinate folder that are not yet references to a blob.
+        """
+        refs = read_refs(dic_path)
+        for jar in glob.glob(os.path.join(dic_path, "*.jar")):
+            digest = refs.get(os.path.basename(jar))
+            if digest is not None and os.path.exists(self.blob_path(digest)) \
+                    and os.path.samefile(jar, self.blob_path(digest)):
+                continue
+            self.put(jar)
+
+    def ingest_tree(self, root_path):
+        """
+        Moves every JAR of a coordinate tree into the store, deduplicating identical bytes.
+        """
+        jars = glob.glob(os.path.join(root_path, "**/*.jar"), recursive=True)
+        for dic_path in sorted(set(os.path.dirname(jar) for jar in jars)):
+            self.ingest_directory(dic_path)
+        return len(jars)
+
+    def gc(self, root_path):
+        """
+        Removes blobs that are no longer referenced by any coordinate folder under `root_path`.
+        """
+        referenced = set()
+        for refs_path in glob.glob(os.path.join(root_path, "**", REFS_FILE), recursive=True):
+            referenced.update(read_refs(os.path.dirname(refs_path)).values())
+        removed = 0
+        for blob in glob.glob(os.path.join(self.root, "sha256", "*", "*", "*")):
+            if os.path.basename(blob) not in referenced:
+                os.remove(blob)
+                removed += 1
+        return removed
+
+
+def read_refs(directory):
+    refs_path = os.path.join(directory, REFS_FILE)
+    if not os.path.exists(refs_path):
+        return {}
+    try:
+        with open(refs_path, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+if __name__ == '__main__':
+    # Deduplicate an existing coordinate tree into the store
+    store=BlobStore()
+    root_path="./metaDB/maven_asset_deps/"
+    print("ingested {} jars".format(store.ingest_tree(root_path)))
+    print("removed {} unreferenced blobs".format(store.gc(root_path)))
@@ -0,0 +1,167 @@
+import os
+import re
+import json
+import bisect
+import struct
+from utils_tool.helper import get_meta_data_path
+from utils_tool.jar_archive import iter_class_entries
+
+
+CLASS_REFS_FILE = "class_refs.json"
+# bump when the content of an index changes, so that persisted indexes are rebuilt
+CLASS_REFS_VERSION = 1
+
+CLASS_MAGIC = b"\xca\xfe\xba\xbe"
+# payload size of each constant pool tag; Utf8 (1) is variable, Long (5) and Double (6) take two slots
+CONSTANT_SIZES = {3: 4, 4: 4, 5: 8, 6: 8, 7: 2, 8: 2, 9: 4, 10: 4, 11: 4, 12: 4,
+                  15: 3, 16: 2, 17: 4, 18: 4, 19: 2, 20: 2}
+
+# class names inside descriptors and generic signatures: Lorg/example/Foo; or Lorg/example/Foo<...>
+DESCRIPTOR_NAME = re.compile(r"L([^;<>()\[\s]+)[;<]")
+# binary or dotted names, as found in class constants and string literals
+JAVA_NAME = re.compile(r"[\w$/.\-]+")
+
+
+class ClassFormatError(Exception):
+    pass
+
+
+def read_utf8_constants(data):
+    """
+    Returns the CONSTANT_Utf8 entries of a class file's constant pool.
+    """
+    if not data.startswith(CLASS_MAGIC):
+        raise ClassFormatError("not a class file")
+    try:
+        (count,) = struct.unpack_from(">H", data, 8)
+        position = 10
+        index = 1
+        strings = []
+        while index < count:
+            tag = data[position]
+            if tag == 1:
+                (length,) = struct.unpack_from(">H", data, position + 1)
+                strings.append(data[position + 3:position + 3 + length].decode("utf-8", errors="replace"))
+                position += 3 + length
+            elif tag in CONSTANT_SIZES:
+                position += 1 + CONSTANT_SIZES[tag]
+                if tag in (5, 6):
+                    index += 1
+            else:
+                raise ClassFormatError(f"unknown constant pool tag {tag}")
+            index += 1
+    except (IndexError, struct.error):
+        raise ClassFormatError("truncated constant pool")
+    return strings
+
+
+def referenced_names(data):
+    """
+    Returns the class and package names a class file refers to, in dotted form.
+
+    Names come from class constants, descriptors, signatures and string
+    literals. A class file that cannot be parsed is scanned as raw bytes.
+    """
+    try:
+        strings = read_utf8_constants(data)
+    except ClassFormatError:
+        strings = JAVA_NAME.findall(data.decode("latin-1"))
+    names = set()
+    for string in strings:
+        for run in JAVA_NAME.findall(string):
+            names.add(run.replace("/", "."))
+        for match in DESCRIPTOR_NAME.finditer(string):
+            names.add(match.group(1).replace("/", "."))
+    return names
+
+
+def get_class_refs_path(jar_path):
+    """
+    Returns where the reference index of a JAR is kept, next to its meta_info.json.
+    """
+    return os.path.join(os.path.dirname(get_meta_data_path(jar_path)), CLASS_REFS_FILE)
+
+
+def jar_signature(jar_path):
+    stat = os.stat(jar_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class ClassRefIndex:
+    """
+    Names referenced by the class files of a JAR, read from their constant pools.
+
+    Replaces one `grep -r` over the extracted JAR per looked-up name: the
+    referenced names are kept sorted, so finding the class files that mention
+    a package or class is a binary search for the first name it prefixes.
+
+    Attributes:
+        classes (list): Entry names of the class files in the JAR.
+        refs (dict): Referenced name -> indexes in `classes` of the files mentioning it.
+        keys (list): Sorted referenced names.
+    """
+    def __init__(self, classes, refs):
+        self.classes = classes
+        self.refs = refs
+        self.keys = sorted(refs)
+
+    @classmethod
+    def build(cls, jar_path):
+        classes = []
+        refs = {}
+        for entry, data in iter_class_entries(jar_path):
+            class_id = len(classes)
+            classes.append(entry)
+            for name in referenced_names(data):
+                refs.setdefault(name, []).append(class_id)
+        return cls(classes, refs)
+
+    def lookup(self, name):
+        """
+        Returns the entry names of the class files referring to `name` or to a name it prefixes.
+        """
+        name = name.replace("/", ".")
+        class_ids = set()
+        position = bisect.bisect_left(self.keys, name)
+        while position < len(self.keys) and self.keys[position].startswith(name):
+            class_ids.update(self.refs[self.keys[position]])
+            position += 1
+        return sorted(self.classes[class_id] for class_id in class_ids)
+
+    def save(self, path, jar_path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        content = {
+            "version": CLASS_REFS_VERSION,
+            "jar": os.path.basename(jar_path),
+            "signature": jar_signature(jar_path),
+            "classes": self.classes,
+            "refs": self.refs,
+        }
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(content, f)
+        os.replace(tmp_path, path)
+
+
+def load_class_refs(jar_path, path=None):
+    """
+    Loads the persisted reference index of a JAR, building it when it is missing
+    or was built from another version of the JAR.
+    """
+    path = path or get_class_refs_path(jar_path)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                content = json.load(f)
+            if (content.get("version") == CLASS_REFS_VERSION
+                    and content.get("jar") == os.path.basename(jar_path)
+                    and content.get("signature") == jar_signature(jar_path)):
+                return ClassRefIndex(content["classes"], content["refs"])
+        except (OSError, ValueError, KeyError):
+            print("fail to load class reference index {}".format(path))
+    index = ClassRefIndex.build(jar_path)
+    try:
+        index.save(path, jar_path)
+    except OSError:
+        print("fail to save class reference index {}".format(path))
+    return index
@@ -133,6 +133,35 @@ def construct_transitive_deps_download_list(sbom_path):
 
 
 
+def get_direct_deps(sbom_path):
+    """
+    Returns the direct dependencies ("groupId|artifactId|version") of the SBOM root,
+    i.e. the only dependencies whose JAR contents (not just packages) are analyzed.
+
+    The root is chosen like analyze_inconsistency.BomGraph does: the first node
+    without parent, in the order nodes enter the dependency graph.
+
+    Returns:
+        list or None: The direct dependencies, or None if the SBOM has no root.
+    """
+    sbom=load_json(sbom_path)
+    nodes={}
+    children=set()
+    for dependency in sbom.get("dependencies",[]):
+        depends_on=dependency.get("dependsOn",[])
+        nodes.setdefault(dependency["ref"],[])
+        for purl in depends_on:
+            if purl not in nodes[dependency["ref"]]:
+                nodes[dependency["ref"]].append(purl)
+            nodes.setdefault(purl,[])
+            children.add(purl)
+    roots=[node for node in nodes if node not in children]
+    if len(roots)==0:
+        return None
+    return [trans_purl(purl) for purl in nodes[roots[0]]]
+
+
+
 if __name__ == '__main__':
     sbom_path="./samples/aaa-cli-jar-0.15.2/aaa-cli-jar-0.15.2-cyclonedx.json"
     download_dep_list=construct_transitive_deps_download_list(sbom_path)
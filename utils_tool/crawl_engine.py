@@ -0,0 +1,137 @@
+import time
+import threading
+import collections
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket.
+
+    Tokens refill continuously at `rate` per second up to `burst`; `acquire`
+    blocks until a token is available.
+    """
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(max(burst, 1))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """
+    Keeps one token bucket per repository host so that every host gets its own
+    politeness budget, independent of the number of crawl workers.
+
+    Attributes:
+        rate (float): Requests per second allowed for each host.
+        burst (int): Number of requests a host may receive back to back.
+    """
+    def __init__(self, rate=5.0, burst=5):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, url):
+        host = urlparse(url).netloc or url
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self.buckets[host] = bucket
+        bucket.acquire()
+
+
+class CrawlStats:
+    """
+    Tracks progress and per-artifact latency of a crawl.
+    """
+    def __init__(self):
+        self.total = 0
+        self.done = 0
+        self.failed = []
+        self.latency = {}
+        self.status = collections.Counter()
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    def summary(self):
+        latencies = sorted(self.latency.values())
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "total": self.total,
+            "done": self.done,
+            "failed": len(self.failed),
+            "status": dict(self.status),
+            "elapsed": round(self.elapsed, 3),
+            "artifacts_per_second": round(self.done / self.elapsed, 3) if self.elapsed else 0.0,
+            "latency_p50": round(percentile(0.50), 3),
+            "latency_p95": round(percentile(0.95), 3),
+            "latency_max": round(latencies[-1], 3) if latencies else 0.0,
+        }
+
+
+def run_crawl(tasks, worker, max_workers=8, desc="Crawling artifacts"):
+    """
+    Runs `worker` over `tasks` on a thread pool and reports progress.
+
+    Args:
+        tasks (list): Items to crawl; each item must be hashable and is used as
+            the key of its latency record (e.g. "groupId|artifactId|version").
+        worker (callable): Called as `worker(task)`; its return value is counted
+            as the status of the task.
+        max_workers (int): Number of concurrent crawl workers.
+        desc (str): Label of the progress bar.
+
+    Returns:
+        CrawlStats: Progress, status counts and per-artifact latency of the crawl.
+    """
+    stats = CrawlStats()
+    stats.total = len(tasks)
+
+    def timed(task):
+        start = time.monotonic()
+        try:
+            return worker(task), None, time.monotonic() - start
+        except Exception as e:
+            return None, e, time.monotonic() - start
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(timed, task): task for task in tasks}
+        with tqdm(total=len(futures), desc=desc) as progress:
+            for future in as_completed(futures):
+                task = futures[future]
+                status, error, latency = future.result()
+                stats.done += 1
+                stats.latency[task] = latency
+                if error is not None:
+                    stats.failed.append((task, repr(error)))
+                    stats.status["exception"] += 1
+                else:
+                    stats.status[str(status)] += 1
+                progress.set_postfix(last=f"{latency:.2f}s", failed=len(stats.failed))
+                progress.update(1)
+
+    stats.elapsed = time.monotonic() - stats.started
+    return stats
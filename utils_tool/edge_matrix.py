@@ -0,0 +1,48 @@
+import numpy as np
+
+
+def bitsets_to_matrix(bitsets, width):
+    """
+    Packs package bitsets into a node x package bit matrix.
+
+    Each row holds one bitset as little-endian 64-bit words, so a row-wise AND
+    compares 64 packages per operation.
+
+    Args:
+        bitsets (list): One bitset (int) per row.
+        width (int): Number of packages (bits) per row.
+
+    Returns:
+        numpy.ndarray: uint64 matrix of shape (len(bitsets), words).
+    """
+    words = max(1, (width + 63) // 64)
+    size = words * 8
+    data = b"".join(bits.to_bytes(size, "little") for bits in bitsets)
+    return np.frombuffer(data, dtype="<u8").reshape(len(bitsets), words)
+
+
+def edges_without_overlap(uses, provides, from_rows, to_rows):
+    """
+    Evaluates every edge at once: an edge has no overlap when none of the packages
+    provided by its target is used by its source.
+
+    Edges whose source uses nothing or whose target provides nothing are not
+    reported, as there is nothing to compare.
+
+    Args:
+        uses (numpy.ndarray): "uses" bit matrix, one row per source node.
+        provides (numpy.ndarray): "provides" bit matrix, one row per target node.
+        from_rows (list): Row in `uses` of the source of each edge.
+        to_rows (list): Row in `provides` of the target of each edge.
+
+    Returns:
+        numpy.ndarray: Boolean flag per edge.
+    """
+    if len(from_rows) == 0:
+        return np.zeros(0, dtype=bool)
+    from_rows = np.asarray(from_rows, dtype=np.intp)
+    to_rows = np.asarray(to_rows, dtype=np.intp)
+    used = uses.any(axis=1)[from_rows]
+    provided = provides.any(axis=1)[to_rows]
+    overlap = (uses[from_rows] & provides[to_rows]).any(axis=1)
+    return used & provided & ~overlap
@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import fcntl
+import shutil
+import zipfile
+from contextlib import contextmanager
+from utils_tool.blob_store import BlobStore
+
+
+EXTRACTION_CACHE_ROOT = "./metaDB/extracted/"
+EXTRACTION_CACHE_QUOTA = 10 * 1024 ** 3
+INDEX_FILE = "cache_index.json"
+LOCK_FILE = ".lock"
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def tree_size(directory):
+    size = 0
+    for dirpath, dirnames, filenames in os.walk(directory):
+        for filename in filenames:
+            size += os.lstat(os.path.join(dirpath, filename)).st_size
+    return size
+
+
+class ExtractionCache:
+    """
+    Extracted JAR trees shared by all audits, keyed by the SHA-256 of the JAR.
+
+    Each JAR is extracted once under `<root>/<digest>/unjar/`. The trees are
+    held within a byte quota: when it is exceeded, the least recently used trees
+    that no audit holds are removed. An audit holds a tree from acquire() until
+    release(); holds are counted per process, so the holds of a process that
+    died are dropped on the next eviction, along with its unfinished extractions.
+
+    The index (`cache_index.json`) is only read and written under an exclusive
+    fcntl lock, so several audit processes can share the cache.
+
+    Attributes:
+        root (str): Directory of the cache.
+        quota (int): Bytes the extracted trees may take.
+        hits (int): acquire() calls answered by an existing tree, in this process.
+        misses (int): acquire() calls that had to extract the JAR, in this process.
+        held (dict): digest -> tree held by this process.
+    """
+    def __init__(self, root=EXTRACTION_CACHE_ROOT, quota=EXTRACTION_CACHE_QUOTA):
+        self.root = root
+        self.quota = quota
+        self.hits = 0
+        self.misses = 0
+        self.held = {}
+        self.blob_store = BlobStore()
+        os.makedirs(root, exist_ok=True)
+
+    def tree_path(self, digest):
+        return os.path.join(self.root, digest, "unjar") + "/"
+
+    @contextmanager
+    def locked_index(self):
+        """
+        Yields the index under the cache lock and writes it back on exit.
+        """
+        with open(os.path.join(self.root, LOCK_FILE), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                index_path = os.path.join(self.root, INDEX_FILE)
+                index = {"entries": {}, "hits": 0, "misses": 0}
+                if os.path.exists(index_path):
+                    try:
+                        with open(index_path, 'r') as f:
+                            index = json.load(f)
+                    except (OSError, json.JSONDecodeError):
+                        print("fail to load extraction cache index, rebuilding it")
+                yield index
+                tmp_path = "{}.{}.tmp".format(index_path, os.getpid())
+                with open(tmp_path, 'w') as f:
+                    json.dump(index, f)
+                os.replace(tmp_path, index_path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def acquire(self, jar_path):
+        """
+        Returns the extracted tree of a JAR, extracting it on a miss, and holds it until release().
+        """
+        digest = self.blob_store.digest_of(jar_path)
+        if digest in self.held:
+            return self.held[digest]
+        tree = self.tree_path(digest)
+        pid = str(os.getpid())
+        with self.locked_index() as index:
+            entry = index["entries"].get(digest)
+            if entry is not None and os.path.isdir(tree):
+                entry["last_used"] = time.time()
+                entry["holds"][pid] = entry["holds"].get(pid, 0) + 1
+                index["hits"] += 1
+                self.hits += 1
+                self.held[digest] = tree
+                return tree
+
+        # extract outside the lock; concurrent misses of the same JAR keep the first finished tree
+        tmp_dir = os.path.join(self.root, "{}.{}.tmp".format(digest, pid))
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        with zipfile.ZipFile(jar_path, 'r') as zip_ref:
+            zip_ref.extractall(os.path.join(tmp_dir, "unjar"))
+        size = tree_size(tmp_dir)
+
+        with self.locked_index() as index:
+            entry = index["entries"].get(digest)
+            if entry is not None and os.path.isdir(tree):
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            else:
+                shutil.rmtree(os.path.join(self.root, digest), ignore_errors=True)
+                os.replace(tmp_dir, os.path.join(self.root, digest))
+                entry = {"size": size, "holds": {}}
+                index["entries"][digest] = entry
+            entry["last_used"] = time.time()
+            entry["holds"][pid] = entry["holds"].get(pid, 0) + 1
+            index["misses"] += 1
+            self.misses += 1
+            self.held[digest] = tree
+            self.evict(index)
+        return tree
+
+    def release(self):
+        """
+        Drops the holds of this process and enforces the quota.
+        """
+        if not self.held:
+            return
+        pid = str(os.getpid())
+        with self.locked_index() as index:
+            for digest in self.held:
+                entry = index["entries"].get(digest)
+                if entry is None:
+                    continue
+                count = entry["holds"].get(pid, 0) - 1
+                if count > 0:
+                    entry["holds"][pid] = count
+                else:
+                    entry["holds"].pop(pid, None)
+            self.held = {}
+            self.evict(index)
+
+    def sweep(self, entries):
+        """
+        Removes the directories under the root that the index does not track: the
+        `<digest>.<pid>.tmp` extractions of dead processes, and trees left out of
+        the index when it was rebuilt. Must be called with the index locked.
+
+        Returns:
+            int: Bytes taken by the extractions still in progress.
+        """
+        in_progress = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name in entries or not os.path.isdir(path):
+                continue
+            if name.endswith(".tmp"):
+                pid = name.rsplit(".", 2)[-2]
+                if pid.isdigit() and pid_alive(int(pid)):
+                    try:
+                        in_progress += tree_size(path)
+                    except OSError:
+                        # the extraction was restarted meanwhile
+                        pass
+                    continue
+            shutil.rmtree(path, ignore_errors=True)
+        return in_progress
+
+    def evict(self, index):
+        """
+        Removes least recently used trees that nobody holds until the cache fits the quota.
+        Untracked directories are swept first, and extractions in progress count
+        against the quota. Must be called with the index locked.
+        """
+        entries = index["entries"]
+        for entry in entries.values():
+            entry["holds"] = {pid: count for pid, count in entry["holds"].items() if pid_alive(int(pid))}
+        total = sum(entry["size"] for entry in entries.values()) + self.sweep(entries)
+        for digest in sorted(entries, key=lambda d: entries[d]["last_used"]):
+            if total <= self.quota:
+                break
+            if entries[digest]["holds"]:
+                continue
+            shutil.rmtree(os.path.join(self.root, digest), ignore_errors=True)
+            total -= entries[digest]["size"]
+            del entries[digest]
+
+    def report(self):
+        print("extraction cache: {} hits, {} misses".format(self.hits, self.misses))
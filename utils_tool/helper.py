@@ -2,6 +2,8 @@ import glob, os, json,pickle
 import collections
 from tqdm import tqdm
 import subprocess
+import shutil
+import threading
 import concurrent.futures
 
 def load_json(file_path):
@@ -64,10 +66,14 @@ def dump_pickle(my_dict, filename):
 
 
 
+def get_meta_data_path(file):
+    dir=file.split("/")[-4]+"/"+file.split("/")[-3]+"/"+file.split("/")[-2]
+    return "./results/jarpkgtags/"+dir+"/meta_info.json"
+
+
 def get_meta_data(file):
 
-    dir=file.split("/")[-4]+"/"+file.split("/")[-3]+"/"+file.split("/")[-2]
-    metafile="./results/jarpkgtags/"+dir+"/meta_info.json"
+    metafile=get_meta_data_path(file)
     if not os.path.exists(metafile):
         print("metadata is not exsiting")
     try:
@@ -76,3 +82,75 @@ def get_meta_data(file):
     except:
         print("fail to load meta_data")
         return None
+
+
+
+FICLONE = 0x40049409
+
+def link_file(src, dst):
+    """
+    Makes `dst` refer to the same bytes as `src` without copying them when possible.
+
+    A hard link is tried first, then a copy-on-write reflink (Linux FICLONE),
+    and a plain copy only as a last resort, e.g. across file systems that
+    support neither.
+    """
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+    try:
+        import fcntl
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        return
+    except (ImportError, OSError):
+        if os.path.exists(dst):
+            os.remove(dst)
+    shutil.copyfile(src, dst)
+
+
+class PersistentJson:
+    """
+    A dict of entries persisted as one JSON file and shared by threads.
+
+    Subclasses read and change `entries` under `lock` and set `dirty` when they
+    change it; save() only rewrites the file then, atomically through a
+    temporary file. A file that cannot be loaded is reported and started afresh.
+
+    Attributes:
+        path (str): JSON file holding the entries.
+        entries (dict): The persisted entries.
+    """
+    def __init__(self, path, description, **dump_options):
+        self.path = path
+        self.dump_options = dump_options
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                print("fail to load {}".format(description))
+
+    def compact(self):
+        """
+        Drops entries that are not worth saving; called by save() with the lock held.
+        """
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            self.compact()
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.entries, f, **self.dump_options)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
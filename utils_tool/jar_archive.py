@@ -0,0 +1,63 @@
+import mmap
+import zipfile
+from contextlib import contextmanager
+
+
+class MappedFile:
+    """
+    Read-only file object over a memory map; mmap itself is not seekable() before Python 3.13.
+    """
+    def __init__(self, mapped):
+        self.mapped = mapped
+
+    def read(self, size=-1):
+        return self.mapped.read(size)
+
+    def seek(self, offset, whence=0):
+        self.mapped.seek(offset, whence)
+        return self.mapped.tell()
+
+    def tell(self):
+        return self.mapped.tell()
+
+    def seekable(self):
+        return True
+
+
+@contextmanager
+def open_jar(jar_path):
+    """
+    Opens a JAR as a ZipFile over a read-only memory map of the archive, so that
+    members are decompressed straight from the mapped bytes.
+    """
+    with open(jar_path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            mapped = None
+        try:
+            with zipfile.ZipFile(MappedFile(mapped) if mapped is not None else f, 'r') as zip_ref:
+                yield zip_ref
+        finally:
+            if mapped is not None:
+                mapped.close()
+
+
+def iter_class_entries(jar_path):
+    """
+    Yields (entry name, bytes) for every .class member of a JAR, without
+    extracting the archive. Other members are never decompressed.
+    """
+    with open_jar(jar_path) as zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir() or not info.filename.endswith(".class"):
+                continue
+            yield info.filename, zip_ref.read(info)
+
+
+def archive_entry_path(jar_path, entry):
+    """
+    Names a member of a JAR in proofs, as `<jar>!/<entry>`.
+    """
+    return "{}!/{}".format(jar_path, entry)
@@ -0,0 +1,159 @@
+import os
+import re
+import struct
+
+
+EOCD_SIGNATURE = b"PK\x05\x06"
+ZIP64_LOCATOR_SIGNATURE = b"PK\x06\x07"
+ZIP64_EOCD_SIGNATURE = b"PK\x06\x06"
+CENTRAL_HEADER_SIGNATURE = b"PK\x01\x02"
+
+EOCD_SIZE = 22
+ZIP64_LOCATOR_SIZE = 20
+ZIP64_EOCD_SIZE = 56
+CENTRAL_HEADER_SIZE = 46
+# the end of central directory record is followed by a comment of at most 64 KiB
+TAIL_SIZE = EOCD_SIZE + 0xFFFF + ZIP64_LOCATOR_SIZE
+
+MULTI_RELEASE_PREFIX = re.compile(r"^META-INF/versions/\d+/")
+
+
+class ProbeError(Exception):
+    pass
+
+
+class LocalFileReader:
+    """
+    Reads byte ranges of a local JAR with seek.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+
+    def read(self, offset, length):
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return f.read(length)
+
+
+class HttpRangeReader:
+    """
+    Reads byte ranges of a remote JAR with HTTP Range requests.
+
+    The first request asks for the tail of the file, which also reveals its
+    size. If the server ignores ranges, the whole body it sent is kept and
+    served from memory.
+
+    Attributes:
+        status_code (int): Status of the first request; 404 means the JAR does not exist.
+    """
+    def __init__(self, session, url, tail_size=TAIL_SIZE):
+        self.session = session
+        self.url = url
+        self.size = None
+        self.tail_offset = None
+        self.tail = b""
+        response = session.get(url, headers={"Range": f"bytes=-{tail_size}"})
+        self.status_code = response.status_code
+        if response.status_code == 206:
+            match = re.match(r"bytes (\d+)-(\d+)/(\d+)", response.headers.get("Content-Range", ""))
+            if match is None:
+                raise ProbeError(f"invalid Content-Range from {url}")
+            self.tail_offset = int(match.group(1))
+            self.size = int(match.group(3))
+            self.tail = response.content
+        elif response.status_code == 200:
+            self.tail_offset = 0
+            self.tail = response.content
+            self.size = len(self.tail)
+
+    def read(self, offset, length):
+        if offset >= self.tail_offset:
+            start = offset - self.tail_offset
+            return self.tail[start:start + length]
+        response = self.session.get(self.url, headers={"Range": f"bytes={offset}-{offset + length - 1}"})
+        if response.status_code != 206:
+            raise ProbeError(f"range request failed with {response.status_code} for {self.url}")
+        return response.content
+
+
+def locate_central_directory(reader):
+    """
+    Finds the central directory of a ZIP archive from its tail.
+
+    Returns:
+        tuple: (offset, size) of the central directory.
+    """
+    tail_offset = max(0, reader.size - TAIL_SIZE)
+    tail = reader.read(tail_offset, reader.size - tail_offset)
+    position = tail.rfind(EOCD_SIGNATURE)
+    if position < 0 or len(tail) - position < EOCD_SIZE:
+        raise ProbeError("end of central directory not found")
+    entries, cd_size, cd_offset = struct.unpack("<HII", tail[position + 10:position + 20])
+
+    if cd_offset == 0xFFFFFFFF or cd_size == 0xFFFFFFFF or entries == 0xFFFF:
+        locator = tail[position - ZIP64_LOCATOR_SIZE:position]
+        if not locator.startswith(ZIP64_LOCATOR_SIGNATURE):
+            raise ProbeError("zip64 locator not found")
+        (zip64_eocd_offset,) = struct.unpack("<Q", locator[8:16])
+        record = reader.read(zip64_eocd_offset, ZIP64_EOCD_SIZE)
+        if not record.startswith(ZIP64_EOCD_SIGNATURE):
+            raise ProbeError("zip64 end of central directory not found")
+        cd_size, cd_offset = struct.unpack("<QQ", record[40:56])
+    return cd_offset, cd_size
+
+
+def read_entry_names(reader):
+    """
+    Lists the entry names of a ZIP archive by reading only its central directory.
+    """
+    cd_offset, cd_size = locate_central_directory(reader)
+    directory = reader.read(cd_offset, cd_size)
+    names = []
+    position = 0
+    while position + CENTRAL_HEADER_SIZE <= len(directory):
+        if directory[position:position + 4] != CENTRAL_HEADER_SIGNATURE:
+            raise ProbeError("corrupt central directory")
+        flags = struct.unpack("<H", directory[position + 8:position + 10])[0]
+        name_length, extra_length, comment_length = struct.unpack("<HHH", directory[position + 28:position + 34])
+        raw_name = directory[position + CENTRAL_HEADER_SIZE:position + CENTRAL_HEADER_SIZE + name_length]
+        # bit 11 marks UTF-8 names, others use the legacy cp437 code page
+        names.append(raw_name.decode("utf-8" if flags & 0x800 else "cp437", errors="replace"))
+        position += CENTRAL_HEADER_SIZE + name_length + extra_length + comment_length
+    return names
+
+
+def packages_from_entries(names):
+    """
+    Derives the Java packages provided by a JAR from its entry names.
+    """
+    packages = set()
+    for name in names:
+        if not name.endswith(".class"):
+            continue
+        name = MULTI_RELEASE_PREFIX.sub("", name)
+        if "/" not in name:
+            # default package and module-info.class
+            continue
+        packages.add(name.rsplit("/", 1)[0].replace("/", "."))
+    return packages
+
+
+def probe_local_jar(path):
+    """
+    Returns the packages of a local JAR by seeking to its central directory.
+    """
+    return packages_from_entries(read_entry_names(LocalFileReader(path)))
+
+
+def probe_remote_jar(session, url):
+    """
+    Returns the packages of a remote JAR by fetching only its central directory.
+
+    Returns:
+        tuple: (set of packages or None, HTTP status code of the first request).
+    """
+    reader = HttpRangeReader(session, url)
+    if reader.size is None:
+        return None, reader.status_code
+    return packages_from_entries(read_entry_names(reader)), reader.status_code
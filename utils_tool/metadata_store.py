@@ -0,0 +1,210 @@
+import os
+import json
+import sqlite3
+
+
+METADATA_DB_PATH = "./metaDB/metadata/metadata.db"
+LEGACY_JAR_TO_PKGS_PATH = "./metaDB/metadata/jar_to_pkgs_dic.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY,
+    coordinate TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS packages (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS artifact_packages (
+    artifact_id INTEGER NOT NULL REFERENCES artifacts(id) ON DELETE CASCADE,
+    package_id INTEGER NOT NULL REFERENCES packages(id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (artifact_id, package_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS artifact_packages_by_package ON artifact_packages (package_id, artifact_id);
+CREATE TABLE IF NOT EXISTS usage_summaries (
+    coordinate TEXT PRIMARY KEY,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS edge_verdicts (
+    from_key TEXT NOT NULL,
+    to_key TEXT NOT NULL,
+    to_packages TEXT NOT NULL,
+    analyzer TEXT NOT NULL,
+    used INTEGER NOT NULL,
+    proof TEXT NOT NULL,
+    PRIMARY KEY (from_key, to_key, to_packages, analyzer)
+) WITHOUT ROWID;
+"""
+
+
+class MetadataStore:
+    """
+    Indexed on-disk store of the packages provided by each artifact (SQLite).
+
+    Replaces jar_to_pkgs_dic.json and pkg_to_jar_dic.json: artifacts and packages
+    are looked up by index instead of parsing the whole mapping, so an audit only
+    reads the rows of the coordinates it touches. Both directions are served by
+    the artifact_packages table, so writing the package list of an artifact
+    updates them together. Looked-up package lists are memoized for the lifetime
+    of the store. An existing jar_to_pkgs_dic.json is migrated when the database
+    is created.
+
+    The usage summary of each tagged artifact (see usage_summary.summarize_meta_info)
+    is kept next to its package list, along with the validation verdicts of
+    dependency edges, which are shared by every audit containing the edge.
+
+    Attributes:
+        path (str): SQLite database file.
+        connection (sqlite3.Connection): Open connection to the database.
+    """
+    def __init__(self, path=METADATA_DB_PATH, legacy_json_path=LEGACY_JAR_TO_PKGS_PATH):
+        self.path = path
+        created = not os.path.exists(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(SCHEMA)
+        self.cache = {}
+        if created and legacy_json_path and os.path.exists(legacy_json_path):
+            self.migrate_from_json(legacy_json_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def artifact_id(self, coordinate):
+        row = self.connection.execute("SELECT id FROM artifacts WHERE coordinate = ?", (coordinate,)).fetchone()
+        return None if row is None else row[0]
+
+    def has(self, coordinate):
+        """
+        Returns True if the package list of "groupId|artifactId|version" is known.
+        """
+        if coordinate in self.cache:
+            return self.cache[coordinate] is not None
+        return self.artifact_id(coordinate) is not None
+
+    def get_packages(self, coordinate):
+        """
+        Returns the packages provided by "groupId|artifactId|version", in the order
+        they were recorded, or None if the artifact is not in the store.
+        """
+        if coordinate in self.cache:
+            return self.cache[coordinate]
+        artifact_id = self.artifact_id(coordinate)
+        packages = None
+        if artifact_id is not None:
+            packages = [name for (name,) in self.connection.execute(
+                "SELECT p.name FROM artifact_packages ap JOIN packages p ON p.id = ap.package_id "
+                "WHERE ap.artifact_id = ? ORDER BY ap.position", (artifact_id,))]
+        self.cache[coordinate] = packages
+        return packages
+
+    def providers(self, package):
+        """
+        Returns the coordinates of the artifacts providing `package`, sorted.
+        """
+        return sorted(coordinate for (coordinate,) in self.connection.execute(
+            "SELECT a.coordinate FROM packages p "
+            "JOIN artifact_packages ap ON ap.package_id = p.id "
+            "JOIN artifacts a ON a.id = ap.artifact_id WHERE p.name = ?", (package,)))
+
+    def write(self, coordinate, packages):
+        """
+        Replaces the package list of an artifact. Must run inside a transaction.
+        """
+        self.cache.pop(coordinate, None)
+        self.connection.execute("DELETE FROM artifacts WHERE coordinate = ?", (coordinate,))
+        artifact_id = self.connection.execute("INSERT INTO artifacts (coordinate) VALUES (?)", (coordinate,)).lastrowid
+        rows = []
+        for position, package in enumerate(dict.fromkeys(packages)):
+            self.connection.execute("INSERT OR IGNORE INTO packages (name) VALUES (?)", (package,))
+            package_id = self.connection.execute("SELECT id FROM packages WHERE name = ?", (package,)).fetchone()[0]
+            rows.append((artifact_id, package_id, position))
+        self.connection.executemany(
+            "INSERT INTO artifact_packages (artifact_id, package_id, position) VALUES (?, ?, ?)", rows)
+
+    def add_many(self, entries, replace=False):
+        """
+        Records several artifacts in one transaction.
+
+        Args:
+            entries (dict): "groupId|artifactId|version" -> iterable of package names.
+            replace (bool): Overwrite artifacts that are already in the store.
+
+        Returns:
+            int: Number of artifacts written.
+        """
+        written = 0
+        with self.connection:
+            for coordinate, packages in entries.items():
+                if not replace and self.has(coordinate):
+                    continue
+                self.write(coordinate, packages)
+                written += 1
+        return written
+
+    def get_usage_summary(self, coordinate):
+        """
+        Returns the usage summary recorded for "groupId|artifactId|version", or None.
+        """
+        row = self.connection.execute(
+            "SELECT summary FROM usage_summaries WHERE coordinate = ?", (coordinate,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put_usage_summaries(self, summaries):
+        """
+        Records usage summaries in one transaction.
+
+        Args:
+            summaries (dict): "groupId|artifactId|version" -> summary.
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO usage_summaries (coordinate, summary) VALUES (?, ?)",
+                [(coordinate, json.dumps(summary)) for coordinate, summary in summaries.items()])
+
+    def get_edge_verdict(self, from_key, to_key, to_packages, analyzer):
+        """
+        Returns the recorded verdict of a dependency edge as (used, proof), or None.
+        """
+        row = self.connection.execute(
+            "SELECT used, proof FROM edge_verdicts "
+            "WHERE from_key = ? AND to_key = ? AND to_packages = ? AND analyzer = ?",
+            (from_key, to_key, to_packages, analyzer)).fetchone()
+        return None if row is None else (bool(row[0]), json.loads(row[1]))
+
+    def put_edge_verdict(self, from_key, to_key, to_packages, analyzer, used, proof):
+        """
+        Records whether the source of a dependency edge uses a package of its target.
+
+        Args:
+            from_key (str): SHA-256 of the source JAR.
+            to_key (str): "groupId|artifactId|version" of the target.
+            to_packages (str): Digest of the package list of the target the verdict was computed on.
+            analyzer (str): Version and settings of the validation that computed it.
+            used (bool): True if a class of the source refers to a package of the target.
+            proof (dict): package -> proof of the lookup.
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO edge_verdicts (from_key, to_key, to_packages, analyzer, used, proof) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (from_key, to_key, to_packages, analyzer, int(used), json.dumps(proof)))
+
+    def migrate_from_json(self, json_path):
+        """
+        Imports a jar_to_pkgs_dic.json mapping into the store.
+        """
+        with open(json_path, 'r') as f:
+            mapping = json.load(f)
+        written = self.add_many(mapping)
+        print(f"migrated {written} artifacts from {json_path} to {self.path}")
+        return written
@@ -0,0 +1,151 @@
+import os
+import re
+from collections import deque
+from utils_tool.jar_archive import iter_class_entries
+
+
+# bytes a binary or dotted class name is made of; a name needle never matches across other bytes
+NAME_RUN = re.compile(rb"[\w$/.\-]+")
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over bytes: finds every pattern occurring in a text
+    in one pass over it, whatever the number of patterns.
+
+    Attributes:
+        goto (list): state -> {byte: next state}.
+        fail (list): state -> state of its longest proper suffix in the trie.
+        output (list): state -> ids of the patterns ending in that state.
+    """
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [set()]
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for byte in pattern:
+                next_state = self.goto[state].get(byte)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][byte] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(set())
+                state = next_state
+            self.output[state].add(pattern_id)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for byte, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and byte not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_state] = self.goto[fail].get(byte, 0)
+                self.output[next_state] |= self.output[self.fail[next_state]]
+
+    def search(self, text):
+        """
+        Returns the ids of the patterns occurring in `text`.
+        """
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set()
+        state = 0
+        for byte in text:
+            while state and byte not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(byte, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+class ClassFileScanner:
+    """
+    Finds which class files mention each of many package or class names, reading
+    every file once instead of once per name.
+
+    A name is searched in its dotted and slashed (binary) forms. Class files are
+    split into runs of name bytes with one regex pass; the automaton only runs
+    over the distinct runs, and its answer for a run is reused across files.
+
+    Attributes:
+        needles (list): Names searched for.
+    """
+    def __init__(self, needles):
+        self.needles = [needle for needle in dict.fromkeys(needles) if len(needle) != 0]
+        patterns = []
+        self.owners = []
+        # names with bytes outside NAME_RUN cannot be found by run, they are searched in the whole file
+        self.unbounded = []
+        for needle_id, needle in enumerate(self.needles):
+            for form in dict.fromkeys([needle.replace("/", "."), needle.replace(".", "/")]):
+                form = form.encode("utf-8")
+                if NAME_RUN.fullmatch(form):
+                    patterns.append(form)
+                    self.owners.append(needle_id)
+                else:
+                    self.unbounded.append((form, needle_id))
+        self.automaton = AhoCorasick(patterns)
+        self.min_length = min((len(pattern) for pattern in patterns), default=0)
+        self.run_hits = {}
+
+    def scan_bytes(self, data):
+        """
+        Returns the ids (positions in `needles`) of the names occurring in `data`.
+        """
+        hits = set()
+        if self.owners:
+            for run in set(NAME_RUN.findall(data)):
+                if len(run) < self.min_length:
+                    continue
+                run_hits = self.run_hits.get(run)
+                if run_hits is None:
+                    run_hits = frozenset(self.owners[pattern_id] for pattern_id in self.automaton.search(run))
+                    self.run_hits[run] = run_hits
+                hits |= run_hits
+        for form, needle_id in self.unbounded:
+            if form in data:
+                hits.add(needle_id)
+        return hits
+
+    def scan_entries(self, entries):
+        """
+        Scans class files given as (name, bytes) pairs.
+
+        Returns:
+            dict: needle -> sorted names of the class files mentioning it.
+        """
+        matches = {needle: [] for needle in self.needles}
+        if not self.needles:
+            return matches
+        for name, data in entries:
+            for needle_id in self.scan_bytes(data):
+                matches[self.needles[needle_id]].append(name)
+        for names in matches.values():
+            names.sort()
+        return matches
+
+    def scan_directory(self, directory):
+        """
+        Scans the class files under `directory`, keyed by their paths.
+        """
+        return self.scan_entries(iter_class_files(directory))
+
+    def scan_archive(self, jar_path):
+        """
+        Scans the class members of a JAR without extracting it, keyed by entry names.
+        """
+        return self.scan_entries(iter_class_entries(jar_path))
+
+
+def iter_class_files(directory):
+    for dirpath, dirnames, filenames in os.walk(directory):
+        for filename in filenames:
+            if not filename.endswith(".class"):
+                continue
+            path = os.path.join(dirpath, filename)
+            with open(path, 'rb') as f:
+                yield path, f.read()
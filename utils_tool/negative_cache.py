@@ -0,0 +1,64 @@
+import time
+from utils_tool.helper import PersistentJson
+
+
+NEGATIVE_CACHE_PATH = "./metaDB/metadata/negative_cache.json"
+
+# reason codes of unavailable coordinates
+REASON_NOT_FOUND = "404"
+REASON_NO_JAR = "no-jar"
+REASON_ERROR = "error"
+
+
+class NegativeCache(PersistentJson):
+    """
+    Persistent record of Maven coordinates that could not be downloaded.
+
+    Entries are keyed by "groupId|artifactId|version" and expire after a TTL,
+    so known-missing coordinates cost no network round trip until then.
+    Transient errors get a shorter TTL than definite answers (404, no JAR).
+
+    Attributes:
+        path (str): JSON file holding the entries.
+        ttl (int): Seconds a 404 or no-jar entry stays valid.
+        error_ttl (int): Seconds an error entry stays valid.
+        entries (dict): key -> {"reason": ..., "time": ..., "detail": ...}.
+    """
+    def __init__(self, path=NEGATIVE_CACHE_PATH, ttl=7 * 24 * 3600, error_ttl=3600):
+        super().__init__(path, "negative cache")
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+
+    def expired(self, entry, now=None):
+        now = time.time() if now is None else now
+        ttl = self.error_ttl if entry["reason"] == REASON_ERROR else self.ttl
+        return now - entry["time"] > ttl
+
+    def lookup(self, key):
+        """
+        Returns the live entry of `key`, or None if the coordinate is not known
+        to be missing (or its entry has expired).
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if self.expired(entry):
+                del self.entries[key]
+                self.dirty = True
+                return None
+            return entry
+
+    def record(self, key, reason, detail=None):
+        with self.lock:
+            self.entries[key] = {"reason": reason, "time": time.time(), "detail": detail}
+            self.dirty = True
+
+    def forget(self, key):
+        with self.lock:
+            if self.entries.pop(key, None) is not None:
+                self.dirty = True
+
+    def compact(self):
+        now = time.time()
+        self.entries = {k: e for k, e in self.entries.items() if not self.expired(e, now)}
@@ -0,0 +1,42 @@
+class PackageInterner:
+    """
+    Maps package names to small integer IDs so that package sets can be kept as
+    bitsets (Python ints, bit i set when package i is in the set).
+
+    Overlap, union and membership tests on bitsets are word-level operations
+    instead of building and intersecting sets of strings.
+
+    Attributes:
+        ids (dict): package name -> ID.
+        names (list): ID -> package name.
+    """
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name):
+        package_id = self.ids.get(name)
+        if package_id is None:
+            package_id = len(self.names)
+            self.ids[name] = package_id
+            self.names.append(name)
+        return package_id
+
+    def bitset(self, names):
+        """
+        Returns the bitset of a collection of package names, interning new names.
+        """
+        bits = 0
+        for name in names:
+            bits |= 1 << self.intern(name)
+        return bits
+
+    def contains(self, bits, name):
+        """
+        Tests whether package `name` is in a bitset, without interning it.
+        """
+        package_id = self.ids.get(name)
+        return package_id is not None and (bits >> package_id) & 1 == 1
@@ -0,0 +1,57 @@
+import os
+import glob
+from utils_tool.helper import PersistentJson
+
+
+PRIMARY_JAR_MANIFEST = "./metaDB/metadata/primary_jar_manifest.json"
+
+
+def select_primary_jar(dic_path):
+    """
+    Picks the JAR of a coordinate folder that stands for the coordinate: the one
+    with the shortest name, i.e. the main JAR rather than a classifier variant.
+
+    Returns:
+        str or None: Path to the JAR, or None if the folder has no JAR.
+    """
+    jar_list = glob.glob(os.path.join(dic_path, '**/*.jar'), recursive=True)
+    if len(jar_list) == 0:
+        return None
+    return min(jar_list, key=len)
+
+
+class PrimaryJarManifest(PersistentJson):
+    """
+    Persistent record of the primary JAR chosen for each coordinate folder.
+
+    Tagging and the compliance check resolve a coordinate to the same JAR, and
+    a folder is only listed again when its recorded JAR has disappeared.
+
+    Attributes:
+        path (str): JSON file holding the entries.
+        entries (dict): coordinate folder -> path to its primary JAR.
+    """
+    def __init__(self, path=PRIMARY_JAR_MANIFEST):
+        super().__init__(path, "primary jar manifest", indent=4, sort_keys=True)
+
+    def get(self, dic_path):
+        """
+        Returns the primary JAR of a coordinate folder, selecting and recording it if needed.
+        """
+        key = os.path.normpath(dic_path)
+        if not os.path.isabs(key):
+            # keep the "./" prefix the result paths are derived from
+            key = os.path.join(".", key)
+        with self.lock:
+            jar = self.entries.get(key)
+            if jar is not None and os.path.exists(jar):
+                return jar
+        jar = select_primary_jar(key)
+        with self.lock:
+            if jar is None:
+                if self.entries.pop(key, None) is not None:
+                    self.dirty = True
+            elif self.entries.get(key) != jar:
+                self.entries[key] = jar
+                self.dirty = True
+        return jar
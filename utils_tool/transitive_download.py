@@ -3,9 +3,18 @@ import time
 import collections
 import requests
 import os,json,glob
+import hashlib
+import zipfile
+import xml.etree.ElementTree as ET
 import requests
 from bs4 import BeautifulSoup
 from tqdm import tqdm
+from utils_tool.http_session import get_default_session, conditional_get
+from utils_tool.negative_cache import REASON_NOT_FOUND, REASON_NO_JAR, REASON_ERROR
+
+STATUS_OK = "ok"
+
+MAVEN_CENTRAL = "https://repo1.maven.org/maven2/"
 
 
 skip=[".asc",".md5",".sha256",".sha512","-javadoc.",".sha1",".source",".sources","source","-tests"]
@@ -18,23 +27,246 @@ def skip_check(link):
     return False
 
 
-def download_maven_artifacts(groupId, artifactId, version, dic_path):
+CHUNK_SIZE = 64 * 1024
 
-    group_path = groupId.replace(".", "/")
+# checksum sidecars in order of preference
+CHECKSUM_SIDECARS = [("sha256", ".sha256"), ("sha1", ".sha1")]
+
+
+class ChecksumError(Exception):
+    pass
+
+
+def fetch_expected_checksum(session, file_url, file_links=None):
+    """
+    Fetches the published checksum of an artifact from its `.sha256`/`.sha1` sidecar.
+
+    With a directory listing, only sidecars that appear in it are requested.
+    Without one, only the `.sha1` sidecar is tried, since Maven repositories
+    publish it for every artifact while `.sha256` is optional.
+
+    Returns:
+        tuple: (algorithm, hex digest), or (None, None) if no usable sidecar is published.
+    """
+    file_link = file_url.rsplit("/", 1)[-1]
+    for algorithm, extension in CHECKSUM_SIDECARS:
+        if file_links is None and algorithm != "sha1":
+            continue
+        if file_links is not None and file_link + extension not in file_links:
+            continue
+        response = session.get(file_url + extension)
+        if response.status_code != 200:
+            continue
+        # sidecars hold either the bare digest or "<digest>  <file name>"
+        fields = response.text.split()
+        digest = fields[0].lower() if fields else ""
+        if len(digest) == hashlib.new(algorithm).digest_size * 2:
+            return algorithm, digest
+    return None, None
+
+
+def load_partial_info(part_path, file_url):
+    """
+    Returns the metadata of a partial download of `file_url`, or None if
+    there is no partial file that can be resumed.
+    """
+    info_path = part_path + ".json"
+    if not os.path.exists(part_path) or not os.path.exists(info_path):
+        return None
+    try:
+        info = load_json(info_path)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if info.get("url") != file_url:
+        return None
+    return info
+
+
+def discard_partial(part_path):
+    for path in (part_path, part_path + ".json"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def write_partial(response, file_url, part_path, offset, info):
+    """
+    Appends the body of `response` to the partial file at `offset`, starting a new
+    partial file and its metadata when `offset` is 0.
+
+    Returns:
+        dict: Metadata of the partial file.
+    """
+    if offset == 0:
+        info = {
+            "url": file_url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "size": int(response.headers["Content-Length"]) if "Content-Length" in response.headers else None,
+        }
+        with open(part_path + ".json", 'w') as f:
+            json.dump(info, f)
+
+    # keep whatever arrived if the connection drops, so the next attempt only fetches the rest
+    with open(part_path, 'ab' if offset > 0 else 'wb') as f:
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            f.write(chunk)
+    return info
 
-    base_url = "https://repo1.maven.org/maven2/"
-    artifact_folder_url = f"{base_url}{group_path}/{artifactId}/{version}/"
 
-    # Get the HTML content of the directory
-    response = requests.get(artifact_folder_url)
+def transfer(session, file_url, file_path, validators, checksum):
+    """
+    Runs one transfer attempt of `stream_download`, resuming the partial file
+    with a Range request when one is available.
+    """
+    part_path = file_path + ".part"
+    info = load_partial_info(part_path, file_url)
+    offset = os.path.getsize(part_path) if info is not None else 0
+
+    if offset > 0:
+        headers = {"Range": f"bytes={offset}-"}
+        # only resume if the artifact did not change since the partial file was written
+        validator = info.get("etag") or info.get("last_modified")
+        if validator:
+            headers["If-Range"] = validator
+        response = session.get(file_url, headers=headers, stream=True)
+    else:
+        discard_partial(part_path)
+        response = conditional_get(session, file_url, validators, file_path, stream=True)
+
+    with response:
+        if response.status_code == 416:
+            # the partial file does not fit the artifact anymore; start over
+            restart = True
+        elif response.status_code == 206:
+            restart = not response.headers.get("Content-Range", "").startswith(f"bytes {offset}-")
+        elif response.status_code == 200:
+            # the server ignored the Range header and sends the whole artifact
+            restart = False
+            offset = 0
+        else:
+            return response.status_code
+        if not restart:
+            info = write_partial(response, file_url, part_path, offset, info)
+
+    if restart:
+        # only once the response has given its connection back to the pool, see below
+        discard_partial(part_path)
+        return transfer(session, file_url, file_path, validators, checksum)
+
+    if info.get("size") is not None and os.path.getsize(part_path) != info["size"]:
+        raise requests.exceptions.ChunkedEncodingError(f"incomplete transfer of {file_url}")
+    # the sidecar is only fetched once the artifact response has given its connection back to the
+    # pool: with a blocking pool of one connection per worker, fetching it earlier never returns
+    algorithm, expected = checksum() if checksum is not None else (None, None)
+    if algorithm:
+        hasher = hashlib.new(algorithm)
+        with open(part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                hasher.update(chunk)
+        if hasher.hexdigest() != expected:
+            discard_partial(part_path)
+            raise ChecksumError(f"{algorithm} mismatch for {file_url}: expected {expected}, got {hasher.hexdigest()}")
+    os.replace(part_path, file_path)
+    os.remove(part_path + ".json")
+    return 200
+
+
+def stream_download(session, file_url, file_path, validators=None, checksum=None, max_attempts=3):
+    """
+    Streams an artifact to disk in chunks, verifying its checksum once it is complete.
+
+    The bytes are written to `<file_path>.part`, with the URL and validators of
+    the transfer kept in `<file_path>.part.json`. The partial file is renamed
+    over `file_path` only once the download is complete and verified, so an
+    interrupted or corrupt transfer never passes for a finished one. When a
+    transfer breaks off, the next attempt (in this call or a later crawl)
+    resumes it with a Range request and falls back to a full download if the
+    server ignores the range.
+
+    Args:
+        session (PooledSession): Session used for the request.
+        file_url (str): URL of the artifact.
+        file_path (str): Destination path.
+        validators (ValidatorCache, optional): Validators for a conditional request.
+        checksum (callable, optional): Returns (algorithm, expected hex digest);
+            only called once the artifact is actually transferred, so a 304
+            costs no sidecar request.
+        max_attempts (int): Number of transfer attempts before giving up.
+
+    Returns:
+        int: HTTP status code of the response (200 when the file was written).
+
+    Raises:
+        ChecksumError: If the downloaded bytes do not match the expected digest.
+    """
+    expected = []
+
+    def checksum_once():
+        if not expected:
+            expected.append(checksum() if checksum is not None else (None, None))
+        return expected[0]
+
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return transfer(session, file_url, file_path, validators, checksum_once)
+        except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                requests.exceptions.Timeout) as e:
+            if attempt == max_attempts:
+                raise
+            print(f"Transfer of {file_url} interrupted ({e}), resuming")
+
+
+def has_partial_downloads(dic_path):
+    return len(glob.glob(os.path.join(dic_path, "*.part"))) > 0
+
+
+def resolve_snapshot_jar(session, artifact_folder_url, artifactId, version):
+    """
+    Resolves the timestamped JAR name of a SNAPSHOT version from its maven-metadata.xml.
+
+    Returns:
+        str or None: JAR file name, or None if the metadata cannot be used.
+    """
+    response = session.get(artifact_folder_url + "maven-metadata.xml")
     if response.status_code != 200:
-        print("Error accessing artifact folder:", response.status_code)
-        #f=open("./log/error.log","a+")
-        #f.write("Error accessing artifact folder:"+artifact_folder_url+"\n")
-        #f.close()
-        return
-    
+        return None
+    try:
+        root = ET.fromstring(response.content)
+    except ET.ParseError:
+        return None
+    # ignore XML namespaces, some repositories add one
+    for element in root.iter():
+        element.tag = element.tag.split("}")[-1]
 
+    for snapshot_version in root.iter("snapshotVersion"):
+        if snapshot_version.findtext("extension") == "jar" and not snapshot_version.findtext("classifier"):
+            return f"{artifactId}-{snapshot_version.findtext('value')}.jar"
+    timestamp = root.findtext("versioning/snapshot/timestamp")
+    build_number = root.findtext("versioning/snapshot/buildNumber")
+    if timestamp and build_number:
+        return f"{artifactId}-{version[:-len('-SNAPSHOT')]}-{timestamp}-{build_number}.jar"
+    return None
+
+
+def get_listing(session, artifact_folder_url, dic_path, validators=None, refresh=False):
+    """
+    Returns the file names of an artifact folder, parsed from its HTML listing.
+
+    A listing cached in `<dic_path>listing.json` (see `save_listing`) is reused
+    without a request; with `refresh` it is revalidated with a conditional request.
+
+    Returns:
+        tuple: (list of file names or None, HTTP status code).
+    """
+    listing_path = dic_path+"listing.json"
+    if os.path.exists(listing_path) and not refresh:
+        return load_json(listing_path)["files"], 200
+
+    response = conditional_get(session, artifact_folder_url, validators, listing_path)
+    if response.status_code == 304:
+        return load_json(listing_path)["files"], 200
+    if response.status_code != 200:
+        return None, response.status_code
 
     # Parse the HTML
     soup = BeautifulSoup(response.text, 'html.parser')
@@ -44,18 +276,84 @@ def download_maven_artifacts(groupId, artifactId, version, dic_path):
 
     # Filter the links to get only the files (ignore directory navigation links)
     file_links = [link['href'] for link in links if not link['href'].endswith('/')]
+    return file_links, 200
 
 
-    if not os.path.exists(dic_path):
-        os.makedirs(dic_path)
+def save_listing(artifact_folder_url, dic_path, file_links):
+    """
+    Caches a listing in `<dic_path>listing.json`. Only called once a JAR of the
+    listing is available: a folder holding nothing but a listing would pass
+    for a crawled coordinate and never be retried.
+    """
+    with open(dic_path+"listing.json", 'w') as f:
+        json.dump({"url": artifact_folder_url, "files": file_links}, f)
+
 
-        #save the response into html
-    with open(dic_path+"response.html", "w", encoding="utf-8") as file:
-        # Write the response content to the file
-        file.write(response.text)
+def fetch_jar(session, file_url, jar_path, validators=None, refresh=False, file_links=None):
+    """
+    Downloads one JAR unless a valid copy is already cached.
 
+    Returns:
+        int or None: 200 if the JAR is available (downloaded or cached), 304 if
+            it was revalidated, the HTTP error code otherwise, or None if the
+            transfer failed.
+    """
+    if os.path.exists(jar_path) and not zipfile.is_zipfile(jar_path):
+        # a truncated or corrupt copy must not be treated as done
+        print("corrupt file removed!"+jar_path+"\n")
+        os.remove(jar_path)
+
+    if os.path.exists(jar_path) and not refresh:
+        print("file exist!"+jar_path+"\n")
+        #f=open("./log/error.log","a+")
+        #f.write("file exist!"+jar_path+"\n")
+        #f.close()
+        return 200
+
+    try:
+        checksum = lambda: fetch_expected_checksum(session, file_url, file_links)
+        status_code = stream_download(session, file_url, jar_path, validators, checksum)
+    except (ChecksumError, requests.RequestException) as e:
+        print("Error downloading file:", e)
+        return None
+
+    file_link = os.path.basename(jar_path)
+    if status_code == 304:
+        print(f"Not modified: {file_link}")
+    elif status_code == 200:
+        print(f"Downloaded: {file_link}")
+        #f=open("./log/transitive_success.log","a+")
+        #f.write(jar_path +"\n")
+        #f.close()
+    return status_code
+
+
+def download_artifact_jars(session, artifact_folder_url, groupId, artifactId, version, dic_path, validators, refresh):
+    """
+    Downloads the JARs of one artifact folder, see `download_maven_artifacts`.
+    """
+    # Try the canonical JAR first, the listing is only needed if it does not exist
+    if version.endswith("-SNAPSHOT"):
+        jar_name = resolve_snapshot_jar(session, artifact_folder_url, artifactId, version)
+    else:
+        jar_name = f"{artifactId}-{version}.jar"
+    if jar_name is not None:
+        status_code = fetch_jar(session, artifact_folder_url + jar_name, dic_path + jar_name, validators, refresh)
+        if status_code in (200, 304):
+            return STATUS_OK
+        if status_code is None:
+            return REASON_ERROR
+
+    file_links, status_code = get_listing(session, artifact_folder_url, dic_path, validators, refresh)
+    if file_links is None:
+        print("Error accessing artifact folder:", status_code)
+        #f=open("./log/error.log","a+")
+        #f.write("Error accessing artifact folder:"+artifact_folder_url+"\n")
+        #f.close()
+        return REASON_NOT_FOUND if status_code == 404 else REASON_ERROR
 
     DONWLOAD=0
+    AVAILABLE=0
     for file_link in file_links:
         file_url = artifact_folder_url + file_link
 
@@ -71,33 +369,70 @@ def download_maven_artifacts(groupId, artifactId, version, dic_path):
         if ".sources" in file_link:
             continue
 
-        if os.path.exists(dic_path+file_link):
-            print("file exist!"+dic_path+file_link+"\n")
-            #f=open("./log/error.log","a+")
-            #f.write("file exist!"+dic_path+file_link+"\n")
-            #f.close()
-            continue
-
-        response = requests.get(file_url)
         DONWLOAD=1
-        
-        if response.status_code == 200:
-            with open(dic_path+file_link, 'wb') as f:
-                f.write(response.content)
-            print(f"Downloaded: {file_link}")
-            #f=open("./log/transitive_success.log","a+")
-            #f.write(dic_path+file_link +"\n")
-            #f.close()
-        else:
-            print("Error downloading file:", response.status_code)
+        status_code = fetch_jar(session, file_url, dic_path+file_link, validators, refresh, file_links)
+        if status_code in (200, 304):
+            AVAILABLE=1
+        elif status_code is not None:
+            print("Error downloading file:", status_code)
             #f=open("./log/error.log","a+")
             #f.write(file_url +"\n")
             #f.close()
+
+    if AVAILABLE==1:
+        save_listing(artifact_folder_url, dic_path, file_links)
+        return STATUS_OK
     if DONWLOAD==0:
         #f=open("./log/error.log","a+")
         #f.write("No jar found:" + f'{groupId}|{artifactId}|{version}' +"\n")
         #f.close()
         print("No jar found:" + f'{groupId}|{artifactId}|{version}' +"\n")
+        return REASON_NO_JAR
+    return REASON_ERROR
+
+def download_maven_artifacts(groupId, artifactId, version, dic_path, session=None, validators=None, refresh=False, base_url=MAVEN_CENTRAL):
+    """
+    Downloads the JAR files of one Maven coordinate into `dic_path`.
+
+    The canonical `artifactId-version.jar` URL (or, for a SNAPSHOT, the JAR named
+    in its maven-metadata.xml) is requested directly. Only if it does not exist
+    is the directory listing fetched, and every JAR it lists is downloaded.
+
+    Args:
+        groupId, artifactId, version (str): Maven coordinate of the artifact.
+        dic_path (str): Directory where the artifact files are stored.
+        session (PooledSession, optional): Shared pooled session; the
+            process-wide default session is used when omitted.
+        validators (ValidatorCache, optional): ETag/Last-Modified store used to
+            send conditional requests for cached listings and artifacts.
+        refresh (bool): Revalidate JARs that already exist in `dic_path`
+            instead of skipping them.
+        base_url (str): Root URL of the Maven repository (Maven Central by default).
+
+    Returns:
+        str: STATUS_OK if at least one JAR is available in `dic_path`, otherwise
+            the reason code: REASON_NOT_FOUND (no listing), REASON_NO_JAR (listing
+            without JAR) or REASON_ERROR (listing or every download failed).
+    """
+    if session is None:
+        session = get_default_session()
+
+    group_path = groupId.replace(".", "/")
+
+    if not base_url.endswith("/"):
+        base_url += "/"
+    artifact_folder_url = f"{base_url}{group_path}/{artifactId}/{version}/"
+
+    if not os.path.exists(dic_path):
+        os.makedirs(dic_path)
+
+    status = download_artifact_jars(session, artifact_folder_url, groupId, artifactId, version,
+                                    dic_path, validators, refresh)
+    # do not leave an empty folder behind, it would mark the coordinate as crawled
+    if status != STATUS_OK and os.path.isdir(dic_path) and not os.listdir(dic_path):
+        os.rmdir(dic_path)
+    return status
+
 
 def load_json(file_path):
     with open(file_path, 'r') as f:
@@ -0,0 +1,77 @@
+# packages from the JDK, which are not considered as external dependencies
+JDK_PREFIXES = ["java.", "javax.", "sun.misc", "org.xml.sax", "sun.nio.ch", "org.w3c.dom", "com.sun."]
+
+# bump when the content of a summary changes, so that ingested metadata is summarized again
+SUMMARY_VERSION = 1
+
+_END = ""
+
+
+class PrefixTrie:
+    """
+    Character trie answering "does any stored prefix start this string?" in a
+    single walk over the string, instead of one startswith() per prefix.
+    """
+    def __init__(self, prefixes=()):
+        self.root = {}
+        for prefix in prefixes:
+            self.insert(prefix)
+
+    def insert(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[_END] = True
+
+    def has_prefix_of(self, item):
+        node = self.root
+        for char in item:
+            if _END in node:
+                return True
+            node = node.get(char)
+            if node is None:
+                return False
+        return _END in node
+
+
+JDK_PACKAGES = PrefixTrie(JDK_PREFIXES)
+
+
+def summarize_meta_info(meta_json):
+    """
+    Derives what the analysis needs from the jarpkgtags metadata of an artifact.
+
+    Used and reflected packages are filtered once: packages of the artifact
+    itself and JDK packages are dropped. Every list keeps the first-seen order
+    and has no duplicates.
+
+    Args:
+        meta_json (dict): Content of meta_info.json.
+
+    Returns:
+        dict: "internal", "uses", "reflected" and "unresolved_dynamic" package lists,
+            and "usage", the union of "uses" and "reflected".
+    """
+    packages = meta_json.get("packages", {})
+    internal = {pkg: None for pkg in packages if len(pkg) != 0}
+    uses = {}
+    reflected = {}
+    unresolved = []
+    for pkg, info in packages.items():
+        unresolved.extend(info.get("unresolved_dynamic", []))
+        if len(pkg) == 0:
+            continue
+        for u in info.get("uses", []):
+            if u not in internal and not JDK_PACKAGES.has_prefix_of(u):
+                uses[u] = None
+        for r in info.get("reflected", []):
+            if r not in internal and not JDK_PACKAGES.has_prefix_of(r):
+                reflected[r] = None
+    return {
+        "version": SUMMARY_VERSION,
+        "internal": list(internal),
+        "uses": list(uses),
+        "reflected": list(reflected),
+        "usage": list(dict.fromkeys(list(uses) + list(reflected))),
+        "unresolved_dynamic": unresolved,
+    }